@@ -0,0 +1,105 @@
+"""
+Benchmark the email pre-cleaning stage on a synthetic noisy corpus.
+
+Usage:
+    python -m src.benchmarks.email_preprocessing --emails 2000
+"""
+import argparse
+import random
+import time
+from email.message import EmailMessage
+from typing import List
+
+from src.utils.data_preprocessing import preprocess_email
+
+
+PRODUCTS = [
+    "Coffee STRÅDAL 620", "Loveseat HEMNHOLM 512", "Sofa VIKTMARK 446",
+    "Wardrobe LUNDLUND 757", "Desk TRÄNHOLM 19", "Desk NORDMARK 476",
+]
+
+DISCLAIMER = (
+    "CONFIDENTIALITY NOTICE: This email and any attachments are intended only for the "
+    "named addressee and may contain privileged information. If you have received this "
+    "email in error, please notify the sender and delete it from your system."
+)
+
+SIGNATURE = "-- \nJohn Smith\nProcurement Lead | Example Corp\n+1 555 0100\nwww.example.com"
+
+
+def build_order_body(rng: random.Random) -> str:
+    """Build the useful part of a synthetic order email."""
+    lines = [f"- {rng.randint(1, 20)} x {name}" for name in rng.sample(PRODUCTS, rng.randint(2, 5))]
+    return (
+        "Hi team,\n\nPlease process the following order for delivery by June 20, 2025:\n\n"
+        + "\n".join(lines)
+        + "\n\nShip to: 123 Maple Street, Springfield, IL 62704\n\nThanks,\nJohn"
+    )
+
+
+def build_reply_chain(rng: random.Random, depth: int) -> str:
+    """Build a quoted reply chain of the given depth."""
+    quoted = []
+    for level in range(depth):
+        prefix = ">" * (level + 1) + " "
+        quoted.append(f"{prefix}On Mon, Jun {level + 2}, 2025 at 10:0{level} AM Sales <sales@example.com> wrote:")
+        quoted.extend(prefix + line for line in build_order_body(rng).splitlines())
+    return "On Tue, Jun 10, 2025 at 9:15 AM Sales <sales@example.com> wrote:\n" + "\n".join(quoted)
+
+
+def build_noisy_email(rng: random.Random) -> str:
+    """Build a single noisy email, randomly wrapped as HTML and/or MIME."""
+    text = build_order_body(rng)
+    text += "\n\n" + SIGNATURE + "\n\n" + DISCLAIMER
+    text += "\n\n" + build_reply_chain(rng, rng.randint(1, 4))
+
+    if rng.random() < 0.4:
+        paragraphs = "".join(f"<p>{p.replace(chr(10), '<br>')}</p>" for p in text.split("\n\n"))
+        text = f"<html><head><style>p {{ margin: 0 }}</style></head><body>{paragraphs}</body></html>"
+
+    if rng.random() < 0.5:
+        message = EmailMessage()
+        message["From"] = "john@example.com"
+        message["To"] = "orders@example.com"
+        message["Subject"] = "Purchase order"
+        if text.startswith("<html>"):
+            message.set_content(text, subtype="html")
+        else:
+            message.set_content(text)
+        text = message.as_string()
+
+    return text
+
+
+def build_corpus(size: int, seed: int = 0) -> List[str]:
+    """Build a reproducible synthetic corpus of noisy emails."""
+    rng = random.Random(seed)
+    return [build_noisy_email(rng) for _ in range(size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=2000, help="Number of synthetic emails")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.emails, args.seed)
+
+    start = time.perf_counter()
+    stats = [preprocess_email(raw)[1] for raw in corpus]
+    elapsed = time.perf_counter() - start
+
+    tokens_before = sum(s["tokens_before"] for s in stats)
+    tokens_after = sum(s["tokens_after"] for s in stats)
+
+    print(f"Emails processed:      {len(corpus)}")
+    print(f"Total time:            {elapsed * 1000:.1f} ms ({elapsed / len(corpus) * 1e6:.1f} us/email)")
+    print(f"Throughput:            {len(corpus) / elapsed:,.0f} emails/s")
+    print(f"Avg tokens before:     {tokens_before / len(corpus):.1f}")
+    print(f"Avg tokens after:      {tokens_after / len(corpus):.1f}")
+    print(f"Avg tokens saved:      {(tokens_before - tokens_after) / len(corpus):.1f} "
+          f"({(tokens_before - tokens_after) / max(tokens_before, 1):.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Load-test /api/process-email against a local stand-in for the OpenAI API.
+
+Starts a fake chat-completions server with configurable latency, error rate
+and response body, starts the Flask app pointed at it (or targets an already
+running server with --app-url), then drives the API at stepped concurrency
+levels and reports throughput, latency percentiles and error rates per level.
+
+The app started by the harness uses a temporary results database, has the
+near-duplicate index disabled so every request reaches the LLM, and does not
+retry failed LLM calls. A request counts as an error when it fails or its
+result has no extracted order.
+
+Usage:
+    python -m src.benchmarks.load_test --levels 1,2,4,8,16 --requests 50 --llm-latency 0.5
+"""
+import os
+import sys
+import json
+import glob
+import time
+import uuid
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Any
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+SAMPLE_EMAIL_PATH = os.path.join(PROJECT_ROOT, 'data', 'uploads', 'sample_email_1.txt')
+UPLOAD_FOLDER = os.path.join(PROJECT_ROOT, 'data', 'uploads')
+
+DEFAULT_COMPLETION = {
+    "products": [
+        {"name": "Coffee STRÅDAL 620", "quantity": 9},
+        {"name": "Loveseat HEMNHOLM 512", "quantity": 2},
+        {"name": "Sofa VIKTMARK 446", "quantity": 10},
+        {"name": "Wardrobe LUNDLUND 757", "quantity": 8},
+    ],
+    "delivery": {"date": "2025-06-20", "address": "123 Maple Street, Springfield, IL 62704"},
+}
+
+
+class FakeOpenAIServer:
+    """
+    Minimal HTTP stand-in for the OpenAI chat-completions endpoint.
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.1, error_rate: float = 0.0,
+                 responses: Optional[List[str]] = None, port: int = 0):
+        """
+        Initialize the fake server.
+
+        Args:
+            latency: Mean response latency in seconds
+            jitter: Maximum random deviation from the mean latency in seconds
+            error_rate: Fraction of requests answered with HTTP 500
+            responses: Completion texts to cycle through (defaults to a fixed order)
+            port: Port to listen on (0 picks a free port)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.responses = responses or [json.dumps(DEFAULT_COMPLETION)]
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def _next_response(self) -> str:
+        with self._lock:
+            response = self.responses[self.request_count % len(self.responses)]
+            self.request_count += 1
+        return response
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                time.sleep(max(0.0, fake.latency + random.uniform(-fake.jitter, fake.jitter)))
+
+                if random.random() < fake.error_rate:
+                    body = {"error": {"message": "Simulated server error", "type": "server_error"}}
+                    status = 500
+                else:
+                    body = {
+                        "id": f"chatcmpl-{uuid.uuid4().hex}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": "fake-model",
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": fake._next_response()},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                    }
+                    status = 200
+
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def start_app(port: int, llm_base_url: str, results_db_path: str) -> subprocess.Popen:
+    """
+    Start the Flask app in a subprocess with the OpenAI client pointed at the fake
+    server, without LLM retries, near-duplicate reuse or the production database.
+
+    Args:
+        port: Port for the Flask app
+        llm_base_url: Base URL of the fake OpenAI server
+        results_db_path: Throwaway SQLite database for the app's results
+
+    Returns:
+        The running app process
+    """
+    env = {
+        **os.environ,
+        "OPENAI_BASE_URL": llm_base_url,
+        "OPENAI_MAX_RETRIES": "0",
+        "NEAR_DUPLICATE_INDEX": "0",
+        "RESULTS_DB_PATH": results_db_path,
+    }
+    command = [sys.executable, "-m", "flask", "--app", "src.interface.app", "run",
+               "--port", str(port), "--no-reload", "--no-debugger", "--with-threads"]
+    return subprocess.Popen(command, cwd=PROJECT_ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for_server(url: str, timeout: float = 60.0) -> None:
+    """Poll a URL until it answers or the timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except urllib.error.HTTPError:
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise TimeoutError(f"Server at {url} did not start within {timeout} seconds")
+
+
+def build_upload(filename: str, content: bytes) -> Dict[str, Any]:
+    """
+    Encode an email file as a multipart/form-data upload.
+
+    Args:
+        filename: Name of the uploaded file
+        content: File content
+
+    Returns:
+        Dictionary with the request body and content type
+    """
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="email_file"; filename="{filename}"\r\n'
+        f"Content-Type: text/plain\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return {"body": body, "content_type": f"multipart/form-data; boundary={boundary}"}
+
+
+def send_request(url: str, upload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """Send one upload and return its latency and outcome."""
+    req = urllib.request.Request(url, data=upload["body"], method="POST",
+                                 headers={"Content-Type": upload["content_type"]})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            result = json.loads(response.read())
+        # Failed workflow steps (e.g. LLM calls) still return 200, with the error listed in "errors"
+        ok = not result.get("errors") and bool(result.get("order"))
+    except Exception:
+        ok = False
+    return {"latency": time.perf_counter() - start, "ok": ok}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def run_level(url: str, concurrency: int, total_requests: int, content: bytes, timeout: float) -> Dict[str, Any]:
+    """
+    Drive the API at a fixed concurrency level.
+
+    Args:
+        url: URL of /api/process-email
+        concurrency: Number of concurrent clients
+        total_requests: Number of requests sent at this level
+        content: Email content uploaded with each request
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Throughput, latency percentiles and error rate for the level
+    """
+    # One file name per client so concurrent uploads never overwrite each other
+    uploads = [build_upload(f"load_test_{i}.txt", content) for i in range(concurrency)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(
+            lambda i: send_request(url, uploads[i % concurrency], timeout),
+            range(total_requests)
+        ))
+    elapsed = time.perf_counter() - start
+
+    latencies = [r["latency"] for r in results if r["ok"]]
+    errors = sum(1 for r in results if not r["ok"])
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "error_rate": round(errors / total_requests, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per concurrency level")
+    parser.add_argument("--email", default=SAMPLE_EMAIL_PATH, help="Email file uploaded with each request")
+    parser.add_argument("--app-url", help="Target an already running server instead of starting the app")
+    parser.add_argument("--app-port", type=int, default=5055, help="Port for the app started by the harness")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mean fake LLM latency in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="Fake LLM latency jitter in seconds")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Fraction of fake LLM calls that fail")
+    parser.add_argument("--llm-responses", help="JSON file with a list of completion texts to serve")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--json", dest="json_output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    responses = None
+    if args.llm_responses:
+        with open(args.llm_responses, 'r') as file:
+            responses = json.load(file)
+
+    with open(args.email, 'rb') as file:
+        content = file.read()
+
+    fake_llm = FakeOpenAIServer(latency=args.llm_latency, jitter=args.llm_jitter,
+                                error_rate=args.llm_error_rate, responses=responses).start()
+    app_process = None
+    temp_dir = None
+    try:
+        if args.app_url:
+            base_url = args.app_url.rstrip('/')
+        else:
+            base_url = f"http://127.0.0.1:{args.app_port}"
+            temp_dir = tempfile.mkdtemp(prefix="load_test_")
+            app_process = start_app(args.app_port, fake_llm.base_url, os.path.join(temp_dir, "results.db"))
+            wait_for_server(base_url + "/")
+
+        report = []
+        print(f"{'conc':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for level in (int(value) for value in args.levels.split(',')):
+            stats = run_level(base_url + "/api/process-email", level, args.requests, content, args.timeout)
+            report.append(stats)
+            print(f"{stats['concurrency']:>5} {stats['throughput']:>8.2f} {stats['p50_ms']:>9.1f} "
+                  f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['error_rate']:>7.1%}")
+
+        print(f"Fake LLM completions served: {fake_llm.request_count}")
+        if args.json_output:
+            with open(args.json_output, 'w') as file:
+                json.dump(report, file, indent=2)
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+            app_process.wait()
+            for path in glob.glob(os.path.join(UPLOAD_FOLDER, "load_test_*.txt")):
+                os.remove(path)
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        fake_llm.stop()
+
+
+if __name__ == "__main__":
+    main()
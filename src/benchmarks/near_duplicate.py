@@ -0,0 +1,115 @@
+"""
+Benchmark near-duplicate lookups in a large MinHash/LSH index.
+
+Fills the index with synthetic signatures, adds a set of real synthetic
+emails, then measures lookup latency for lightly edited resubmissions
+(expected hits) and unrelated emails (expected misses).
+
+Usage:
+    python -m src.benchmarks.near_duplicate --stored 1000000
+"""
+import argparse
+import random
+import time
+from typing import List
+
+import numpy as np
+
+from src.benchmarks.email_preprocessing import build_order_body, SIGNATURE
+from src.utils.near_duplicate import NearDuplicateIndex, make_dedup_payload
+
+
+WORDS = (
+    "invoice meeting schedule shipment warehouse pallet quote budget review contract "
+    "chair table lamp office kitchen garden supplier catalog discount return warranty "
+    "monday friday urgent update question project request confirm account payment"
+).split()
+
+
+def build_original(rng: random.Random) -> str:
+    """Build a plain-text order email with a signature."""
+    return build_order_body(rng) + "\n\n" + SIGNATURE
+
+
+def build_unrelated(rng: random.Random) -> str:
+    """Build an email with random wording and product lines, unrelated to the stored ones."""
+    sentences = [" ".join(rng.choices(WORDS, k=rng.randint(6, 12))).capitalize() + "." for _ in range(4)]
+    items = [f"- {rng.randint(1, 50)} x {' '.join(rng.choices(WORDS, k=2))} {rng.randint(1, 999)}" for _ in range(3)]
+    return "\n".join(sentences[:2] + items + sentences[2:])
+
+
+def edit_email(email: str, rng: random.Random) -> str:
+    """Simulate a resubmission: forward prefix, changed greeting, reordered product lines."""
+    lines = email.splitlines()
+    product_lines = [i for i, line in enumerate(lines) if line.startswith("- ")]
+    shuffled = [lines[i] for i in product_lines]
+    rng.shuffle(shuffled)
+    for i, line in zip(product_lines, shuffled):
+        lines[i] = line
+    return "Fwd: purchase order\n\n" + "\n".join(lines).replace("Hi team", "Hello there", 1)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stored", type=int, default=1_000_000, help="Number of stored emails")
+    parser.add_argument("--queries", type=int, default=1000, help="Number of lookups per kind")
+    parser.add_argument("--num-perm", type=int, default=64, help="MinHash permutations")
+    parser.add_argument("--bands", type=int, default=16, help="LSH bands")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = NearDuplicateIndex(capacity=args.stored, num_perm=args.num_perm, bands=args.bands)
+
+    # Bulk-fill with random signatures standing in for previously processed emails
+    start = time.perf_counter()
+    np_rng = np.random.default_rng(args.seed)
+    filler = args.stored - args.queries
+    chunk = 100_000
+    for offset in range(0, filler, chunk):
+        size = min(chunk, filler - offset)
+        signatures = np_rng.integers(0, 2**32, size=(size, args.num_perm), dtype=np.uint32)
+        index.add_signatures(signatures, [{"filler": True}] * size)
+    fill_time = time.perf_counter() - start
+
+    originals = [build_original(rng) for _ in range(args.queries)]
+    start = time.perf_counter()
+    for email in originals:
+        index.add(email, make_dedup_payload(email, {"products": []}))
+    add_time = (time.perf_counter() - start) / len(originals)
+
+    edited = [edit_email(email, rng) for email in originals]
+    unrelated = [build_unrelated(rng) for _ in range(args.queries)]
+
+    results = {}
+    for label, emails in (("near-duplicate", edited), ("unrelated", unrelated)):
+        latencies = []
+        hits = 0
+        for email in emails:
+            start = time.perf_counter()
+            match = index.query(email)
+            latencies.append(time.perf_counter() - start)
+            hits += match is not None
+        results[label] = (latencies, hits)
+
+    memory = index.signatures.nbytes + index.band_hashes.nbytes + sum(
+        h.nbytes + s.nbytes for h, s in zip(index._sorted_hashes, index._sorted_slots)
+    )
+
+    print(f"Stored emails:         {index.size:,}")
+    print(f"Bulk fill:             {fill_time:.1f} s")
+    print(f"Index arrays:          {memory / 2**20:.0f} MB")
+    print(f"Add (with signature):  {add_time * 1e6:.0f} us/email")
+    for label, (latencies, hits) in results.items():
+        print(f"{label:<22} p50 {percentile(latencies, 50) * 1e6:.0f} us, "
+              f"p99 {percentile(latencies, 99) * 1e6:.0f} us, hit rate {hits / len(latencies):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark result serialization on large orders.
+
+Compares the previous approach (indented json.dumps with a fallback for
+NumPy scalars) against the serialization module, reporting encode time and
+payload size per order size.
+
+Usage:
+    python -m src.benchmarks.serialization --lines 100,1000,10000
+"""
+import json
+import time
+import argparse
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+from src.utils import serialization
+
+
+def build_result(lines: int) -> Dict[str, Any]:
+    """Build a final result with NumPy scalars, as produced by catalog lookups."""
+    rng = np.random.default_rng(0)
+    verified = [
+        {
+            "name": f"Desk NORDMARK {i}",
+            "found_in_catalog": True,
+            "quantity_requested": int(rng.integers(1, 50)),
+            "quantity_available": np.int64(rng.integers(0, 100)),
+            "minimum_order_quantity": np.int64(rng.integers(1, 10)),
+            "quantity_valid": np.bool_(rng.random() < 0.8),
+            "price": np.float64(round(rng.uniform(10, 1000), 2)),
+            "product_code": f"DSK-{i:04d}",
+            "description": f"A modern desk named 'Desk NORDMARK {i}', designed with style and functionality in mind.",
+        }
+        for i in range(lines)
+    ]
+    return {
+        "email_filename": "large_order.txt",
+        "order": {"products": [{"name": p["name"], "quantity": p["quantity_requested"]} for p in verified]},
+        "validation": {
+            "verified_products": verified,
+            "missing_products": [],
+            "total_price": np.float64(sum(p["price"] * p["quantity_requested"] for p in verified)),
+        },
+        "success": False,
+    }
+
+
+def time_encoder(encode: Callable[[Any], Any], result: Dict[str, Any], repeat: int) -> Dict[str, float]:
+    """Return the best encode time in milliseconds and the payload size in bytes."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = encode(result)
+        best = min(best, time.perf_counter() - start)
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return {"ms": best * 1000, "bytes": len(payload)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", default="100,1000,10000", help="Comma-separated order sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    encoders = {
+        "json indent=2 (before)": lambda r: json.dumps(r, indent=2, default=lambda o: o.item()),
+        "serialization.dumps_bytes": serialization.dumps_bytes,
+    }
+    backend = "orjson" if serialization.orjson is not None else "json (stdlib)"
+    print(f"Serialization backend: {backend}")
+    print(f"{'lines':>7} {'encoder':<28} {'ms':>9} {'KB':>9}")
+
+    for lines in (int(value) for value in args.lines.split(',')):
+        result = build_result(lines)
+        for name, encode in encoders.items():
+            stats = time_encoder(encode, result, args.repeat)
+            print(f"{lines:>7} {name:<28} {stats['ms']:>9.2f} {stats['bytes'] / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
 import os
-import json
-from flask import Flask, render_template, request, jsonify, flash
+import sys
+import time
+import atexit
+import signal
+import threading
+from datetime import datetime
+from flask import Flask, Response, render_template, request, jsonify, flash
 from werkzeug.utils import secure_filename
 
 # Import the orchestrator
 from src.ochestration.orchestrator import OrderProcessingOrchestrator
+from src.utils.document_ingestion import extract_document_text, DocumentIngestionError
+from src.utils.result_store import ResultStore
+from src.utils.near_duplicate import NearDuplicateIndex
+from src.utils.serialization import dumps, dumps_bytes
 
 app = Flask(__name__)
 app.secret_key = 'zaqathon_secret_key'
@@ -12,22 +21,102 @@ app.secret_key = 'zaqathon_secret_key'
 # Configure upload folder
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'uploads')
 CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'database', 'product_catalog.csv')
+RESULTS_DB_PATH = os.environ.get('RESULTS_DB_PATH') or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'database', 'results.db')
+NEAR_DUPLICATE_INDEX_PATH = os.environ.get('NEAR_DUPLICATE_INDEX_PATH') or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'database', 'near_duplicates.npz')
+
+# Set NEAR_DUPLICATE_INDEX=0 to send every email to the LLM, e.g. when load testing
+NEAR_DUPLICATE_ENABLED = os.environ.get('NEAR_DUPLICATE_INDEX', '1').lower() not in ('0', 'false', 'no')
+
+# Set REQUEST_PROFILING=1 to let clients profile a request with the X-Profile header
+REQUEST_PROFILING_ENABLED = os.environ.get('REQUEST_PROFILING', '0').lower() in ('1', 'true', 'yes')
 
 # Create upload directory if it doesn't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 # Configure allowed file extensions
-ALLOWED_EXTENSIONS = {'txt'}
+ALLOWED_EXTENSIONS = {'txt', 'eml', 'pdf'}
+
+# Seconds between saves of new near-duplicate index entries
+NEAR_DUPLICATE_SAVE_INTERVAL = 60
+
+# Load the near-duplicate index from the previous run; new entries are saved by the serving process
+if not NEAR_DUPLICATE_ENABLED:
+    near_duplicate_index = None
+elif os.path.exists(NEAR_DUPLICATE_INDEX_PATH):
+    near_duplicate_index = NearDuplicateIndex.load(NEAR_DUPLICATE_INDEX_PATH)
+else:
+    near_duplicate_index = NearDuplicateIndex()
 
-# Initialize orchestrator
+# Initialize the result store and orchestrator
+result_store = ResultStore(RESULTS_DB_PATH)
 orchestrator = OrderProcessingOrchestrator(
     catalog_path=CATALOG_PATH,
-    temperature=0.2
+    temperature=0.2,
+    result_store=result_store,
+    near_duplicate_index=near_duplicate_index
 )
 
+_background_pid = None
+_background_lock = threading.Lock()
+
+def save_near_duplicates():
+    if near_duplicate_index is not None:
+        near_duplicate_index.save_updates(NEAR_DUPLICATE_INDEX_PATH)
+
+def save_near_duplicates_periodically():
+    while True:
+        time.sleep(NEAR_DUPLICATE_SAVE_INTERVAL)
+        try:
+            save_near_duplicates()
+        except Exception:
+            app.logger.exception("Saving the near-duplicate index failed")
+
+@app.before_request
+def start_background_tasks():
+    # Threads do not survive a fork, so every serving process starts its own saver
+    global _background_pid
+    if near_duplicate_index is None or _background_pid == os.getpid():
+        return
+    with _background_lock:
+        if _background_pid != os.getpid():
+            _background_pid = os.getpid()
+            threading.Thread(target=save_near_duplicates_periodically, daemon=True).start()
+
+def shutdown():
+    # Write buffered results and new near-duplicate entries before the process exits
+    result_store.close()
+    save_near_duplicates()
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def read_uploaded_file(file_path):
+    # PDF order forms go through document ingestion, everything else is plain text
+    if file_path.lower().endswith('.pdf'):
+        return extract_document_text(file_path)
+    with open(file_path, 'r') as f:
+        return f.read()
+
+def json_response(obj, status=200):
+    # Results may hold NumPy values and can be large, so use the compact fast encoder
+    return Response(dumps_bytes(obj), status=status, mimetype='application/json')
+
+def parse_bool_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
+def parse_timestamp_arg(name):
+    # Accept Unix seconds or an ISO 8601 date/datetime
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     result = None
@@ -51,8 +140,11 @@ def index():
             file.save(file_path)
             
             # Read the email content
-            with open(file_path, 'r') as f:
-                email_content = f.read()
+            try:
+                email_content = read_uploaded_file(file_path)
+            except (DocumentIngestionError, UnicodeDecodeError) as e:
+                flash(f'Could not read the uploaded file: {e}')
+                return render_template('index.html')
             
             # Process the email through the orchestrator
             result = orchestrator.process_email(email_content, filename)
@@ -61,8 +153,8 @@ def index():
             result_formatted = {
                 "success": result["success"],
                 "summary": result["summary"],
-                "order": json.dumps(result["order"], indent=2),
-                "validation": json.dumps(result["validation"], indent=2)
+                "order": dumps(result["order"], indent=True),
+                "validation": dumps(result["validation"], indent=True)
             }
             
             return render_template('index.html', result=result_formatted)
@@ -87,15 +179,49 @@ def process_email_api():
         file.save(file_path)
         
         # Read the email content
-        with open(file_path, 'r') as f:
-            email_content = f.read()
+        try:
+            email_content = read_uploaded_file(file_path)
+        except (DocumentIngestionError, UnicodeDecodeError) as e:
+            return jsonify({"error": f"Could not read the uploaded file: {e}"}), 422
         
-        # Process the email through the orchestrator
-        result = orchestrator.process_email(email_content, filename)
+        # Process the email through the orchestrator, profiling it if requested
+        profile = REQUEST_PROFILING_ENABLED and request.headers.get('X-Profile', '').lower() in ('1', 'true', 'yes')
+        result = orchestrator.process_email(email_content, filename, profile=profile)
         
-        return jsonify(result)
+        return json_response(result)
     
     return jsonify({"error": "Invalid file type"}), 400
 
+@app.route('/api/orders', methods=['GET'])
+def list_orders_api():
+    try:
+        page = result_store.query(
+            email_filename=request.args.get('email_filename'),
+            success=parse_bool_arg('success'),
+            has_missing_products=parse_bool_arg('has_missing_products'),
+            product_code=request.args.get('product_code'),
+            delivery_date_from=request.args.get('delivery_date_from'),
+            delivery_date_to=request.args.get('delivery_date_to'),
+            created_from=parse_timestamp_arg('created_from'),
+            created_to=parse_timestamp_arg('created_to'),
+            min_processing_time=request.args.get('min_processing_time', type=float),
+            limit=request.args.get('limit', 50, type=int),
+            cursor=request.args.get('cursor', type=int)
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return json_response(page)
+
+@app.route('/api/orders/<int:order_id>', methods=['GET'])
+def get_order_api(order_id):
+    order = result_store.get(order_id)
+    if order is None:
+        return jsonify({"error": "Order not found"}), 404
+    return json_response(order)
+
 if __name__ == '__main__':
+    # SIGTERM skips atexit handlers unless it is turned into a normal exit
+    atexit.register(shutdown)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     app.run(debug=True)
\ No newline at end of file
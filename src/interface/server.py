@@ -0,0 +1,189 @@
+"""
+Pre-fork production server for the order processing app.
+
+The master process imports the app, which loads the product catalog and
+builds its indexes once, then forks the workers. The catalog's pandas,
+NumPy and SciPy buffers are only read by the workers, so they stay shared
+copy-on-write; gc.freeze() keeps the garbage collector from touching (and
+thereby copying) the objects created before the fork.
+
+Usage:
+    python -m src.interface.server --workers 4 --port 8000
+
+Send SIGUSR1 to the master to print a per-worker memory report. On SIGTERM
+or SIGINT, each worker stops serving and flushes its buffered results and
+near-duplicate index entries before exiting.
+"""
+import os
+import gc
+import sys
+import signal
+import socket
+import argparse
+import threading
+from typing import Callable, Dict, List
+
+
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_memory(pid: int) -> Dict[str, int]:
+    """
+    Read memory usage of a process from /proc (Linux only).
+
+    Args:
+        pid: Process id
+
+    Returns:
+        Dictionary of memory fields in kB, empty when /proc is unavailable
+    """
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as file:
+            for line in file:
+                name, _, value = line.partition(':')
+                if name in MEMORY_FIELDS:
+                    memory[name] = int(value.split()[0])
+    except OSError:
+        pass
+    return memory
+
+
+def report_memory(master_pid: int, worker_pids: List[int]) -> None:
+    """
+    Print RSS, proportional set size and shared memory for the master and each
+    worker. The gap between summed RSS and summed PSS is the memory saved by
+    sharing the catalog copy-on-write.
+
+    Args:
+        master_pid: Process id of the master
+        worker_pids: Process ids of the workers
+    """
+    rows = [("master", master_pid)] + [(f"worker {i}", pid) for i, pid in enumerate(worker_pids)]
+    print(f"{'process':<10} {'pid':>7} {'RSS MB':>9} {'PSS MB':>9} {'shared MB':>10} {'private MB':>11}", flush=True)
+
+    total_rss = total_pss = 0
+    for label, pid in rows:
+        memory = read_memory(pid)
+        if not memory:
+            print(f"{label:<10} {pid:>7}   memory information unavailable", flush=True)
+            continue
+        shared = memory.get("Shared_Clean", 0) + memory.get("Shared_Dirty", 0)
+        private = memory.get("Private_Clean", 0) + memory.get("Private_Dirty", 0)
+        total_rss += memory.get("Rss", 0)
+        total_pss += memory.get("Pss", 0)
+        print(f"{label:<10} {pid:>7} {memory.get('Rss', 0) / 1024:>9.1f} {memory.get('Pss', 0) / 1024:>9.1f} "
+              f"{shared / 1024:>10.1f} {private / 1024:>11.1f}", flush=True)
+
+    if total_rss:
+        print(f"Total RSS {total_rss / 1024:.1f} MB, actual (PSS) {total_pss / 1024:.1f} MB, "
+              f"saved by sharing {(total_rss - total_pss) / 1024:.1f} MB", flush=True)
+
+
+def serve_worker(app, listener: socket.socket, threaded: bool, on_shutdown: Callable[[], None]) -> None:
+    """
+    Serve requests on the inherited listening socket until SIGTERM or SIGINT,
+    then stop accepting requests and run the shutdown hook.
+
+    Args:
+        app: WSGI application
+        listener: Listening socket created by the master
+        threaded: Whether each worker handles requests in threads
+        on_shutdown: Called before the worker exits, e.g. to flush buffered results
+    """
+    from werkzeug.serving import make_server
+
+    gc.enable()
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, app, threaded=threaded, fd=listener.fileno())
+
+    def stop(signum, frame):
+        # serve_forever() runs in this thread and shutdown() waits for it, so stop it from another thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    # The memory report is printed by the master; a SIGUSR1 sent to the whole process group must not kill workers
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+
+    try:
+        server.serve_forever()
+    finally:
+        on_shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--no-threads", action="store_true", help="Handle one request at a time per worker")
+    parser.add_argument("--memory-report-delay", type=float, default=2.0,
+                        help="Seconds after startup to print the memory report (negative disables it)")
+    args = parser.parse_args()
+
+    # Keep the collector from scanning the catalog objects while they are created,
+    # then move them to the permanent generation so workers never write to them
+    gc.disable()
+    from src.interface.app import app, shutdown as shutdown_app
+    gc.freeze()
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((args.host, args.port))
+    listener.listen(128)
+    listener.set_inheritable(True)
+
+    master_pid = os.getpid()
+    workers: List[int] = []
+    shutting_down = False
+
+    def spawn_worker() -> int:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve_worker(app, listener, not args.no_threads, shutdown_app)
+            finally:
+                os._exit(0)
+        return pid
+
+    def shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGUSR1, lambda signum, frame: report_memory(master_pid, workers))
+
+    workers.extend(spawn_worker() for _ in range(args.workers))
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers (master pid {master_pid})",
+          flush=True)
+
+    if args.memory_report_delay >= 0:
+        signal.signal(signal.SIGALRM, lambda signum, frame: report_memory(master_pid, workers))
+        signal.setitimer(signal.ITIMER_REAL, max(args.memory_report_delay, 0.001))
+
+    # Reap workers, replacing any that die unexpectedly
+    while workers:
+        try:
+            pid, _ = os.wait()
+        except InterruptedError:
+            continue
+        except ChildProcessError:
+            break
+        if pid in workers:
+            workers.remove(pid)
+            if not shutting_down:
+                print(f"Worker {pid} exited, starting a replacement", file=sys.stderr, flush=True)
+                workers.append(spawn_worker())
+
+    listener.close()
+
+
+if __name__ == "__main__":
+    main()
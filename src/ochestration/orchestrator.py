@@ -1,4 +1,6 @@
 import os
+import time
+from contextlib import nullcontext
 from typing import Dict, List, Any, Optional
 import json
 from langgraph.graph import StateGraph, END
@@ -7,6 +9,11 @@ from typing import TypedDict, Literal
 from src.utils.agents.email_agent import EmailOrderAgent
 from src.utils.agents.lookup_agent import LookupAgent
 from src.utils.data_loader import load_emails
+from src.utils.profiling import profile_run, DEFAULT_PROFILE_DIR
+from src.utils.result_store import ResultStore
+from src.utils.near_duplicate import NearDuplicateIndex
+from src.utils.serialization import write_jsonl
+from src.utils.scheduler import PriorityOrderQueue
 
 
 # Define the state for the graph
@@ -16,6 +23,7 @@ class State(TypedDict):
     order_info: Dict[str, Any]
     validation_results: Dict[str, Any]
     final_result: Dict[str, Any]
+    preprocessing: Dict[str, Any]
     errors: List[str]
     status: Literal["processing", "complete", "error"]
 
@@ -26,8 +34,8 @@ def extract_order(state: State, email_agent: EmailOrderAgent) -> State:
     Extract order information from an email using the EmailOrderAgent.
     """
     try:
-        order_info = email_agent.process_email(state["email_content"])
-        return {**state, "order_info": order_info}
+        order_info, preprocessing = email_agent.extract_order_from_email(state["email_content"])
+        return {**state, "order_info": order_info, "preprocessing": preprocessing}
     except Exception as e:
         return {**state, "errors": state.get("errors", []) + [str(e)], "status": "error"}
 
@@ -43,14 +51,17 @@ def validate_order(state: State, lookup_agent: LookupAgent) -> State:
         return {**state, "errors": state.get("errors", []) + [str(e)], "status": "error"}
 
 
-def generate_solutions(state: State, lookup_agent: LookupAgent) -> State:
+def generate_solutions(state: State, lookup_agent: LookupAgent, narrative: bool = False) -> State:
     """
     Generate solutions for any issues found in the order using the LookupAgent.
+    Fulfillment options are computed locally; the LLM is only consulted for
+    narrative recommendations when explicitly requested.
     """
     try:
-        solutions = lookup_agent.generate_extended_insights(state["validation_results"])
         validation_results = state["validation_results"]
-        validation_results["solutions"] = solutions
+        validation_results["fulfillment_plan"] = lookup_agent.plan_fulfillment(validation_results)
+        if narrative:
+            validation_results["solutions"] = lookup_agent.generate_extended_insights(validation_results)
         return {**state, "validation_results": validation_results}
     except Exception as e:
         return {**state, "errors": state.get("errors", []) + [str(e)], "status": "error"}
@@ -77,14 +88,27 @@ def prepare_final_output(state: State) -> State:
                 "total_price": validation_results.get("total_price", 0),
                 "has_delivery_info": bool(order_info.get("delivery", {})),
             },
+            "preprocessing": state.get("preprocessing", {}),
+            "errors": state.get("errors", []),
         }
         return {**state, "final_result": final_result, "status": "complete"}
     except Exception as e:
         return {**state, "errors": state.get("errors", []) + [str(e)], "status": "error"}
 
 
+def needs_solutions(state: State) -> bool:
+    """
+    Check whether the validated order has missing products or invalid quantities.
+    """
+    validation_results = state["validation_results"]
+    return bool(validation_results.get("missing_products", [])) or not all(
+        p.get("quantity_valid", True) for p in validation_results.get("verified_products", [])
+    )
+
+
 # Create and configure the graph
-def create_processing_graph(email_agent: EmailOrderAgent, lookup_agent: LookupAgent) -> StateGraph:
+def create_processing_graph(email_agent: EmailOrderAgent, lookup_agent: LookupAgent,
+                            narrative_solutions: bool = False) -> StateGraph:
     """
     Create the LangGraph workflow for order processing.
     """
@@ -93,14 +117,14 @@ def create_processing_graph(email_agent: EmailOrderAgent, lookup_agent: LookupAg
     # Add nodes
     workflow.add_node("extract_order", lambda state: extract_order(state, email_agent))
     workflow.add_node("validate_order", lambda state: validate_order(state, lookup_agent))
-    workflow.add_node("generate_solutions", lambda state: generate_solutions(state, lookup_agent))
+    workflow.add_node("generate_solutions", lambda state: generate_solutions(state, lookup_agent, narrative_solutions))
     workflow.add_node("prepare_final_output", prepare_final_output)
 
     # Define edges
     workflow.add_edge("extract_order", "validate_order")
     workflow.add_conditional_edges(
         "validate_order",
-        lambda state: bool(state["validation_results"].get("missing_products", [])),
+        needs_solutions,
         {
             True: "generate_solutions",
             False: "prepare_final_output",
@@ -122,7 +146,10 @@ class OrderProcessingOrchestrator:
     """
     
     def __init__(self, catalog_path: str, emails_dir: Optional[str] = None,
-                 temperature: float = 0.2, model: str = "gpt-4o"):
+                 temperature: float = 0.2, model: str = "gpt-4o",
+                 narrative_solutions: bool = False, result_store: Optional[ResultStore] = None,
+                 near_duplicate_index: Optional[NearDuplicateIndex] = None,
+                 order_queue: Optional[PriorityOrderQueue] = None):
         """
         Initialize the orchestrator with needed agents.
         
@@ -131,9 +158,19 @@ class OrderProcessingOrchestrator:
             emails_dir: Directory containing email text files
             temperature: LLM temperature setting
             model: LLM model to use
+            narrative_solutions: Whether to ask the LLM for narrative recommendations
+                on problem orders in addition to the local fulfillment plan
+            result_store: Optional store where every final result is persisted
+            near_duplicate_index: Optional index used to skip extraction of near-duplicate emails
+            order_queue: Queue that orders batch and queued work by deadline and customer tier
         """
+        self.narrative_solutions = narrative_solutions
+        self.result_store = result_store
+        self.order_queue = order_queue or PriorityOrderQueue()
+        
         # Initialize agents
-        self.email_agent = EmailOrderAgent(emails_dir=emails_dir, temperature=temperature, model=model)
+        self.email_agent = EmailOrderAgent(emails_dir=emails_dir, temperature=temperature, model=model,
+                                           near_duplicate_index=near_duplicate_index)
         self.lookup_agent = LookupAgent(catalog_path=catalog_path, temperature=temperature, model=model)
         
         # Build the workflow graph
@@ -151,14 +188,15 @@ class OrderProcessingOrchestrator:
         # Define nodes (steps in the workflow)
         workflow.add_node("extract_order", lambda state: extract_order(state, self.email_agent))
         workflow.add_node("validate_order", lambda state: validate_order(state, self.lookup_agent))
-        workflow.add_node("generate_solutions", lambda state: generate_solutions(state, self.lookup_agent))
+        workflow.add_node("generate_solutions",
+                          lambda state: generate_solutions(state, self.lookup_agent, self.narrative_solutions))
         workflow.add_node("prepare_final_output", prepare_final_output)
 
         # Define edges (transitions between steps)
         workflow.add_edge("extract_order", "validate_order")
         workflow.add_conditional_edges(
             "validate_order",
-            lambda state: bool(state["validation_results"].get("missing_products", [])),
+            needs_solutions,
             {
                 True: "generate_solutions",
                 False: "prepare_final_output",
@@ -172,10 +210,39 @@ class OrderProcessingOrchestrator:
         
         return workflow.compile()
     
-    def process_email(self, email_content: str, email_filename: str = "unknown.txt") -> Dict[str, Any]:
+    def process_email(self, email_content: str, email_filename: str = "unknown.txt",
+                      profile: bool = False, profile_dir: str = DEFAULT_PROFILE_DIR) -> Dict[str, Any]:
         """
         Process a single email through the workflow.
         
+        Args:
+            email_content: The content of the email
+            email_filename: Name of the email file for reference
+            profile: Capture a cProfile/tracemalloc trace of this run
+            profile_dir: Directory where profile files are written
+            
+        Returns:
+            Final processing result, with a "profile" report when profiling is enabled
+        """
+        profiler = profile_run(email_filename, profile_dir) if profile else nullcontext()
+        with profiler as profile_report:
+            start = time.perf_counter()
+            result = self._run_workflow(email_content, email_filename)
+            processing_time = time.perf_counter() - start
+        
+        if profile:
+            result["profile"] = profile_report
+        
+        # Stored only once the result is complete, so the profile report is always included
+        if self.result_store is not None and result:
+            self.result_store.add(result, processing_time)
+        
+        return result
+    
+    def _run_workflow(self, email_content: str, email_filename: str) -> Dict[str, Any]:
+        """
+        Build the workflow graph and run a single email through it.
+        
         Args:
             email_content: The content of the email
             email_filename: Name of the email file for reference
@@ -191,6 +258,7 @@ class OrderProcessingOrchestrator:
             "order_info": {},
             "validation_results": {},
             "final_result": {},
+            "preprocessing": {},
             "errors": [],
             "status": "processing",
         }
@@ -200,12 +268,14 @@ class OrderProcessingOrchestrator:
         
         return result["final_result"]
     
-    def process_all_emails(self, emails_dir: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    def process_all_emails(self, emails_dir: Optional[str] = None,
+                           output_path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
         """
-        Process all emails in the specified directory.
+        Process all emails in the specified directory, most urgent first.
         
         Args:
             emails_dir: Directory containing email text files
+            output_path: Optional JSON Lines file to write the results to
             
         Returns:
             Dictionary mapping email filenames to processing results
@@ -216,10 +286,38 @@ class OrderProcessingOrchestrator:
         else:
             emails = self.email_agent.emails
         
-        # Process each email
-        results = {}
+        # Queue every email, then process them in priority order
         for filename, content in emails.items():
-            results[filename] = self.process_email(content, filename)
+            self.order_queue.push(filename, content)
+        results = self.process_queue()
+        
+        if self.result_store is not None:
+            self.result_store.flush()
+        
+        if output_path:
+            write_jsonl(results.values(), output_path)
+        
+        return results
+    
+    def process_queue(self, block: bool = False, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Process queued emails in priority order until the queue is empty.
+        Several threads may drain the same queue concurrently.
+        
+        Args:
+            block: Keep waiting for new emails instead of returning when the queue is empty
+            timeout: Seconds to wait for a new email before returning when blocking
+            
+        Returns:
+            Dictionary mapping email filenames to processing results
+        """
+        results = {}
+        while True:
+            entry = self.order_queue.pop(block=block, timeout=timeout)
+            if entry is None:
+                break
+            results[entry["email_filename"]] = self.process_email(entry["email_content"], entry["email_filename"])
+            self.order_queue.mark_done(entry)
         
         return results
 
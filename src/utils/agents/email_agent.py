@@ -1,11 +1,13 @@
 import os
+import copy
 import json
 from typing import Dict, List, Optional, Any, Tuple
 
 from src.utils.data_loader import load_emails
-from src.utils.data_preprocessing import normalize_whitespace
+from src.utils.data_preprocessing import preprocess_email, estimate_tokens
 from src.utils.prompt_template import get_email_parsing_prompt
 from src.utils.config import get_llm, generate_completion
+from src.utils.near_duplicate import NearDuplicateIndex, make_dedup_payload, reuse_order_info
 
 
 class EmailOrderAgent:
@@ -15,7 +17,8 @@ class EmailOrderAgent:
     """
     
     def __init__(self, emails_dir: Optional[str] = None, 
-                 temperature: float = 0.2, model: str = "gpt-4o"):
+                 temperature: float = 0.2, model: str = "gpt-4o",
+                 near_duplicate_index: Optional[NearDuplicateIndex] = None):
         """
         Initialize the email order agent.
         
@@ -23,6 +26,7 @@ class EmailOrderAgent:
             emails_dir: Directory containing email text files
             temperature: LLM temperature setting
             model: LLM model to use
+            near_duplicate_index: Optional index used to reuse extractions of near-duplicate emails
         """
         # Load emails if directory is provided
         self.emails = {}
@@ -31,6 +35,9 @@ class EmailOrderAgent:
         
         # Initialize the LLM
         self.llm = get_llm(temperature=temperature, model=model)
+        
+        # Near-duplicate detection
+        self.near_duplicate_index = near_duplicate_index
     
     def load_emails_from_dir(self, emails_dir: str) -> Dict[str, str]:
         """
@@ -45,7 +52,7 @@ class EmailOrderAgent:
         self.emails = load_emails(emails_dir)
         return self.emails
     
-    def extract_order_from_email(self, email_content: str) -> Dict[str, Any]:
+    def extract_order_from_email(self, email_content: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """
         Extract order information from email content using LLM.
         
@@ -53,17 +60,50 @@ class EmailOrderAgent:
             email_content: The content of the email
             
         Returns:
-            Dictionary containing extracted order information
+            Tuple of the extracted order information and statistics about the
+            prompt tokens saved by pre-cleaning or near-duplicate reuse
         """
-        # Clean the email content
-        cleaned_email = normalize_whitespace(email_content)
+        # Reuse the extraction of a near-duplicate email, re-checking only its product lines
+        if self.near_duplicate_index is not None:
+            match = self.near_duplicate_index.query(email_content)
+            if match is not None:
+                payload, similarity = match
+                order_info = reuse_order_info(payload, email_content)
+                if order_info is not None:
+                    tokens_before = estimate_tokens(email_content)
+                    stats = {
+                        "tokens_before": tokens_before,
+                        "tokens_after": 0,
+                        "tokens_saved": tokens_before,
+                        "near_duplicate_similarity": similarity,
+                    }
+                    return copy.deepcopy(order_info), stats
+        
+        # Strip quotes, signatures, disclaimers and markup before prompting
+        cleaned_email, stats = preprocess_email(email_content)
         
         # Generate the prompt for email parsing
         prompt = get_email_parsing_prompt(cleaned_email)
         
         # Get the LLM response
         response = generate_completion(self.llm, prompt)
+        order_info = self._parse_order_response(response)
+        
+        if self.near_duplicate_index is not None and order_info.get("products"):
+            self.near_duplicate_index.add(email_content, make_dedup_payload(email_content, order_info))
+        
+        return order_info, stats
+    
+    def _parse_order_response(self, response: str) -> Dict[str, Any]:
+        """
+        Parse the LLM response into order information.
         
+        Args:
+            response: Raw LLM response
+            
+        Returns:
+            Dictionary containing extracted order information
+        """
         # Parse the JSON response
         try:
             order_info = json.loads(response)
@@ -93,7 +133,7 @@ class EmailOrderAgent:
             Dictionary with extracted order information
         """
         # Extract order information
-        order_info = self.extract_order_from_email(email_content)
+        order_info, _ = self.extract_order_from_email(email_content)
         return order_info
     
     def process_all_emails(self) -> Dict[str, Dict[str, Any]]:
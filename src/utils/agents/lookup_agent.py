@@ -1,7 +1,9 @@
-import json
 from typing import Dict, List, Optional, Any
 
 from src.utils.data_loader import load_product_catalog, create_product_lookup
+from src.utils.similarity_index import ProductSimilarityIndex
+from src.utils.fulfillment_planner import plan_fulfillment
+from src.utils.serialization import dumps
 from src.utils.config import get_llm, generate_completion
 
 
@@ -22,6 +24,7 @@ class LookupAgent:
         # Load the product catalog
         self.catalog_df = load_product_catalog(catalog_path)
         self.product_lookup = create_product_lookup(self.catalog_df)
+        self.similarity_index = ProductSimilarityIndex(self.catalog_df)
         
         # Initialize LLM parameters
         self.temperature = temperature
@@ -42,6 +45,7 @@ class LookupAgent:
             return {
                 "verified_products": [],
                 "missing_products": [],
+                "substitutes": {},
                 "total_price": 0,
                 "insights": "No products found in the order."
             }
@@ -71,9 +75,10 @@ class LookupAgent:
             
             if not matching_products.empty:
                 product_details = matching_products.iloc[0]
-                available_in_stock = product_details["Available_in_Stock"]
-                price = product_details["Price"]
-                min_order_quantity = product_details["Min_Order_Quantity"]
+                # Convert NumPy scalars to native types once, so results serialize cheaply
+                available_in_stock = int(product_details["Available_in_Stock"])
+                price = float(product_details["Price"])
+                min_order_quantity = int(product_details["Min_Order_Quantity"])
                 
                 verified_products.append({
                     "name": product_name,
@@ -83,7 +88,7 @@ class LookupAgent:
                     "minimum_order_quantity": min_order_quantity,
                     "quantity_valid": quantity >= min_order_quantity and quantity <= available_in_stock,
                     "price": price,
-                    "product_code": product_details["Product_Code"],
+                    "product_code": str(product_details.name),
                     "description": product_details["Description"]
                 })
                 
@@ -91,9 +96,13 @@ class LookupAgent:
             else:
                 missing_products.append(product_name)
         
+        # Suggest in-stock substitutes for all missing products in one batch
+        substitutes = self.similarity_index.suggest_substitutes(missing_products)
+        
         return {
             "verified_products": verified_products,
             "missing_products": missing_products,
+            "substitutes": substitutes,
             "total_price": total_price,
             "insights": self._generate_manual_insights(verified_products, missing_products, total_price)
         }
@@ -116,6 +125,22 @@ class LookupAgent:
         
         return "\n".join(insights)
     
+    def plan_fulfillment(self, validation_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Compute deterministic fulfillment options for lines with MOQ or stock violations.
+        
+        Args:
+            validation_results: Results from product verification
+            
+        Returns:
+            List of fulfillment plans, one per problematic line
+        """
+        return plan_fulfillment(
+            validation_results.get("verified_products", []),
+            self.catalog_df,
+            self.similarity_index
+        )
+    
     def generate_extended_insights(self, validation_results: Dict[str, Any]) -> str:
         """
         Generate additional insights about the order using LLM.
@@ -134,7 +159,7 @@ class LookupAgent:
             prompt = f"""
             Analyze the following order verification results and provide business insights:
             
-            {json.dumps(validation_results, indent=2)}
+            {dumps(validation_results)}
             
             Provide insights on:
             1. Order completeness and any issues
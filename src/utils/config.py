@@ -2,6 +2,30 @@ import os
 from typing import Optional
 from openai import OpenAI
 
+from src.utils.llm_cassette import LLMCassette
+
+# Cassette used to record or replay LLM calls; configured from LLM_CASSETTE* environment variables
+_cassette: Optional[LLMCassette] = LLMCassette.from_env()
+
+def set_cassette(cassette: Optional[LLMCassette]) -> None:
+    """
+    Record or replay all LLM calls through a cassette, or go back to live calls.
+    
+    Args:
+        cassette: Cassette to use, or None for live calls
+    """
+    global _cassette
+    _cassette = cassette
+
+def get_cassette() -> Optional[LLMCassette]:
+    """
+    Get the cassette LLM calls currently go through.
+    
+    Returns:
+        Active cassette, or None for live calls
+    """
+    return _cassette
+
 def read_api_key(key_name: str = "OPENAI_API_KEY") -> str:
     """
     Read the API key from the llm_keys.txt file.
@@ -37,10 +61,16 @@ def get_llm(temperature: float = 0.7, model: str = "gpt-4o") -> OpenAI:
     Returns:
         Configured OpenAI client ready to use for completions
     """
-    api_key = read_api_key("OPENAI_API_KEY")
+    try:
+        api_key = read_api_key("OPENAI_API_KEY")
+    except (FileNotFoundError, ValueError):
+        # Replayed runs never reach the API, so they work without a key
+        if _cassette is None or _cassette.mode != "replay":
+            raise
+        api_key = "replay"
     
-    # Initialize the OpenAI client
-    client = OpenAI(api_key=api_key)
+    # Initialize the OpenAI client; OPENAI_MAX_RETRIES=0 surfaces API errors immediately (e.g. in load tests)
+    client = OpenAI(api_key=api_key, max_retries=int(os.environ.get("OPENAI_MAX_RETRIES", 2)))
     
     # Return the client
     # Note: The model and temperature will be used when making actual API calls
@@ -69,10 +99,17 @@ def generate_completion(client: OpenAI, prompt: str,
     model = model or client.default_model
     temperature = temperature or client.default_temperature
     
+    if _cassette is not None and _cassette.mode == "replay":
+        return _cassette.replay(prompt, model, temperature)
+    
     response = client.chat.completions.create(
         model=model,
         messages=[{"role": "user", "content": prompt}],
         temperature=temperature
     )
+    content = response.choices[0].message.content
+    
+    if _cassette is not None:
+        _cassette.record(prompt, model, temperature, content)
     
-    return response.choices[0].message.content
\ No newline at end of file
+    return content
\ No newline at end of file
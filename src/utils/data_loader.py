@@ -2,6 +2,8 @@ import os
 import pandas as pd
 from typing import Dict, List, Union, Optional
 
+from src.utils.document_ingestion import extract_document_text
+
 
 def load_product_catalog(catalog_path: str) -> pd.DataFrame:
     """
@@ -26,10 +28,11 @@ def load_product_catalog(catalog_path: str) -> pd.DataFrame:
 
 def load_emails(emails_dir: str) -> Dict[str, str]:
     """
-    Load all email text files from a directory.
+    Load all email text files from a directory. PDF order forms are
+    converted to text so they can be processed like emails.
     
     Args:
-        emails_dir: Directory containing email text files
+        emails_dir: Directory containing email text files and PDF order forms
         
     Returns:
         Dictionary mapping filename to email content
@@ -39,13 +42,19 @@ def load_emails(emails_dir: str) -> Dict[str, str]:
     
     emails = {}
     for filename in os.listdir(emails_dir):
-        if filename.endswith('.txt'):
+        if filename.endswith(('.txt', '.eml')):
             file_path = os.path.join(emails_dir, filename)
             try:
                 with open(file_path, 'r', encoding='utf-8') as file:
                     emails[filename] = file.read()
             except Exception as e:
                 print(f"Error reading {filename}: {e}")
+        elif filename.lower().endswith('.pdf'):
+            file_path = os.path.join(emails_dir, filename)
+            try:
+                emails[filename] = extract_document_text(file_path)
+            except Exception as e:
+                print(f"Error reading {filename}: {e}")
     
     return emails
 
@@ -1,5 +1,15 @@
 import re
-from typing import Optional, List, Dict, Any
+from email import message_from_string
+from email import policy as email_policy
+from html.parser import HTMLParser
+from typing import Optional, List, Dict, Any, Tuple
+
+try:
+    import tiktoken
+    _token_encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    # tiktoken is optional and may fail to fetch its encoding offline
+    _token_encoding = None
 
 
 def normalize_whitespace(text: str) -> str:
@@ -48,4 +58,244 @@ def clean_text(text: str) -> str:
     return text
 
 
+# Markers that introduce a quoted reply chain below the new message
+QUOTE_MARKER_PATTERNS = [
+    re.compile(r'^On\b[^\n]*(?:\n[^\n]*)?\bwrote:[ \t]*$', re.MULTILINE),
+    re.compile(r'^-{2,}\s*Original Message\s*-{2,}', re.MULTILINE | re.IGNORECASE),
+    re.compile(r'^_{10,}[ \t]*\n\s*From:', re.MULTILINE),
+    re.compile(r'^From:[^\n]*\n(?:[^\n]*\n){0,3}?(?:Sent|Date):', re.MULTILINE),
+]
+
+# Markers that introduce a forwarded message, which is kept in full
+FORWARD_MARKER_PATTERN = re.compile(
+    r'^(?:-{2,}\s*Forwarded message\s*-{2,}|Begin forwarded message:)', re.MULTILINE | re.IGNORECASE
+)
+
+# Signature delimiters and mobile client footers
+SIGNATURE_PATTERNS = [
+    re.compile(r'^-- ?$', re.MULTILINE),
+    re.compile(r'^Sent from my \w+', re.MULTILINE | re.IGNORECASE),
+    re.compile(r'^Get Outlook for \w+', re.MULTILINE | re.IGNORECASE),
+]
+
+# Trailing paragraphs containing one of these full phrases are treated as legal disclaimers
+DISCLAIMER_PATTERN = re.compile(
+    r'intended (?:only )?for the (?:use of the )?(?:named )?(?:addressee|recipient)'
+    r'|intended recipient|received this (?:e-?mail|message) in error'
+    r'|consider the environment before printing',
+    re.IGNORECASE
+)
+
+# Order lines, digits or product names ("Desk TR\u00c4NHOLM") protect a paragraph from being dropped
+ORDER_LINE_PATTERN = re.compile(r'^\s*(?:[-*\u2022]\s|\d+\s*(?:x|pcs|units?)\b)', re.MULTILINE | re.IGNORECASE)
+PRODUCT_TOKEN_PATTERN = re.compile(r'\d|\b[A-Z][a-z]+\s+[A-Z\u00c0-\u00d6\u00d8-\u00de]{3,}\b')
+
+HEADER_LINE_PATTERN = re.compile(r'^[A-Za-z][A-Za-z0-9-]*:[ \t]')
+HTML_TAG_PATTERN = re.compile(r'<\s*(?:html|body|div|p|br|table|span|font)\b', re.IGNORECASE)
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """
+    Minimal HTML to text converter that keeps line structure for block elements.
+    """
+
+    BLOCK_TAGS = {'p', 'div', 'br', 'tr', 'table', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote'}
+    SKIP_TAGS = {'script', 'style', 'head', 'title'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == 'li':
+            self.parts.append('\n- ')
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in self.BLOCK_TAGS or tag == 'li':
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """
+    Convert HTML email content to plain text, dropping scripts and styles.
+    
+    Args:
+        html: HTML content
+        
+    Returns:
+        Plain text with one line per block element
+    """
+    if not html:
+        return ""
+    
+    extractor = _HTMLTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    
+    # Collapse runs of spaces on each line and drop empty lines
+    lines = (re.sub(r'[ \t\xa0]+', ' ', line).strip() for line in ''.join(extractor.parts).splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def parse_mime_email(raw_email: str) -> str:
+    """
+    Extract the readable body of a MIME (.eml) message. Plain text parts are
+    preferred; HTML parts are converted to text. Non-MIME input is returned unchanged.
+    
+    Args:
+        raw_email: Raw email, with or without MIME headers
+        
+    Returns:
+        Subject line followed by the message body
+    """
+    if not raw_email or not HEADER_LINE_PATTERN.match(raw_email):
+        return raw_email or ""
+    
+    header_block = raw_email.split('\n\n', 1)[0]
+    if not re.search(r'^(?:From|Subject|Content-Type|MIME-Version):', header_block, re.MULTILINE | re.IGNORECASE):
+        return raw_email
+    
+    message = message_from_string(raw_email, policy=email_policy.default)
+    body_part = message.get_body(preferencelist=('plain', 'html'))
+    if body_part is None:
+        return raw_email
+    
+    body = body_part.get_content()
+    if body_part.get_content_subtype() == 'html':
+        body = html_to_text(body)
+    
+    subject = message.get('Subject')
+    return f"Subject: {subject}\n\n{body}" if subject else body
+
+
+def strip_quoted_replies(text: str) -> str:
+    """
+    Remove quoted reply chains ("On ... wrote:", "Original Message" blocks and
+    ">" quoted lines). The quote is only removed when the new message on top
+    contains order lines itself; otherwise the order details most likely live
+    in the quoted part. Forwarded messages are always kept.
+    
+    Args:
+        text: Email body
+        
+    Returns:
+        Email body without the quoted reply chain
+    """
+    if not text:
+        return ""
+    
+    cut = len(text)
+    for pattern in QUOTE_MARKER_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            cut = min(cut, match.start())
+    
+    forward = FORWARD_MARKER_PATTERN.search(text)
+    if forward and forward.start() <= cut:
+        return text
+    
+    new_message = text[:cut]
+    if not ORDER_LINE_PATTERN.search(new_message):
+        return text
+    
+    return '\n'.join(line for line in new_message.splitlines() if not line.lstrip().startswith('>'))
+
+
+def _is_disclaimer(paragraph: str) -> bool:
+    """Whether a paragraph is legal boilerplate that cannot contain order details."""
+    return (
+        bool(DISCLAIMER_PATTERN.search(paragraph))
+        and not PRODUCT_TOKEN_PATTERN.search(paragraph)
+        and not ORDER_LINE_PATTERN.search(paragraph)
+    )
+
+
+def remove_signature_and_disclaimers(text: str) -> str:
+    """
+    Remove the signature block, mobile client footers and legal disclaimer
+    paragraphs at the end of the email. A signature delimiter or footer with
+    order lines below it is not treated as a signature, and paragraphs that
+    could hold order details (digits, order lines or product names) are
+    always kept.
+    
+    Args:
+        text: Email body
+        
+    Returns:
+        Email body without signature and disclaimers
+    """
+    if not text:
+        return ""
+    
+    for pattern in SIGNATURE_PATTERNS:
+        for match in pattern.finditer(text):
+            if not ORDER_LINE_PATTERN.search(text, match.end()):
+                text = text[:match.start()]
+                break
+    
+    paragraphs = re.split(r'\n\s*\n', text)
+    while len(paragraphs) > 1 and _is_disclaimer(paragraphs[-1]):
+        paragraphs.pop()
+    return '\n\n'.join(paragraphs)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in a text. Uses tiktoken when it is
+    installed and falls back to the usual four-characters-per-token rule.
+    
+    Args:
+        text: Input text
+        
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    if _token_encoding is not None:
+        return len(_token_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def preprocess_email(raw_email: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Clean an email before it is embedded into the extraction prompt: parse
+    MIME, convert HTML to text, strip quoted replies, signatures and
+    disclaimers, then normalize whitespace.
+    
+    Args:
+        raw_email: Raw email content
+        
+    Returns:
+        Tuple of the cleaned email and statistics about the tokens saved
+    """
+    text = parse_mime_email(raw_email)
+    if HTML_TAG_PATTERN.search(text):
+        text = html_to_text(text)
+    text = strip_quoted_replies(text)
+    text = remove_signature_and_disclaimers(text)
+    cleaned_email = normalize_whitespace(text)
+    
+    tokens_before = estimate_tokens(raw_email)
+    tokens_after = estimate_tokens(cleaned_email)
+    stats = {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+    }
+    
+    return cleaned_email, stats
+
+
 
@@ -0,0 +1,204 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import pymupdf
+
+
+# Pages with fewer extracted characters than this are treated as scanned images
+MIN_TEXT_LAYER_CHARS = 20
+
+
+class DocumentIngestionError(Exception):
+    """Raised when a document cannot be opened or its pages cannot be OCR'd."""
+
+
+def _ocr_page(page_pdf: bytes, dpi: int, language: str) -> str:
+    """
+    Rasterize a single-page PDF and run OCR on it. Runs inside a worker process.
+
+    Args:
+        page_pdf: The page to OCR, as a single-page PDF
+        dpi: Resolution used when rasterizing the page
+        language: Tesseract language code
+
+    Returns:
+        Text recognized on the page
+    """
+    import pytesseract
+    from PIL import Image
+
+    with pymupdf.open(stream=page_pdf, filetype="pdf") as document:
+        pixmap = document[0].get_pixmap(dpi=dpi)
+        image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+    return pytesseract.image_to_string(image, lang=language)
+
+
+class DocumentIngestor:
+    """
+    Extracts text from PDF order forms so they can be processed like email text.
+    The embedded text layer is used where present; only pages without one are
+    rasterized and OCR'd, in parallel on a process pool. OCR results are cached
+    by the hash of each page's own bytes. Instances are safe to share between
+    threads.
+    """
+
+    def __init__(self, ocr_workers: Optional[int] = None, dpi: int = 300,
+                 language: str = "eng", cache_size: int = 1024):
+        """
+        Initialize the document ingestor.
+
+        Args:
+            ocr_workers: Number of OCR worker processes (defaults to the CPU count)
+            dpi: Resolution used when rasterizing pages for OCR
+            language: Tesseract language code
+            cache_size: Maximum number of page texts kept in the cache
+        """
+        self.ocr_workers = ocr_workers or os.cpu_count() or 1
+        self.dpi = dpi
+        self.language = language
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the OCR process pool on first use and reuse it afterwards."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.ocr_workers)
+            return self._executor
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Look up a cached page text, marking it as recently used."""
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+            return text
+
+    def _cache_put(self, key: str, text: str) -> None:
+        """Store a page text, evicting the least recently used entries."""
+        with self._lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def extract_pages(self, pdf_path: str) -> List[str]:
+        """
+        Extract the text of every page in a PDF.
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Returns:
+            List of page texts in page order
+
+        Raises:
+            DocumentIngestionError: If the PDF is invalid or OCR fails
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"Document not found at: {pdf_path}")
+
+        with open(pdf_path, 'rb') as file:
+            content = file.read()
+
+        pages: List[Optional[str]] = []
+        ocr_pending: List[Tuple[int, str, bytes]] = []
+
+        try:
+            document = pymupdf.open(stream=content, filetype="pdf")
+        except RuntimeError as e:
+            raise DocumentIngestionError(f"Could not open PDF {os.path.basename(pdf_path)}: {e}") from e
+
+        with document:
+            for page_number, page in enumerate(document):
+                text = page.get_text()
+                if len(text.strip()) >= MIN_TEXT_LAYER_CHARS:
+                    pages.append(text)
+                    continue
+
+                # No usable text layer; OCR the page from the bytes read above, not the file,
+                # which a concurrent upload with the same name may have replaced. Without a
+                # new /ID the single-page PDF is identical wherever the page appears.
+                with pymupdf.open() as single_page:
+                    single_page.insert_pdf(document, from_page=page_number, to_page=page_number)
+                    page_pdf = single_page.tobytes(no_new_id=True)
+                key = f"{hashlib.sha256(page_pdf).hexdigest()}:{self.dpi}:{self.language}"
+                cached = self._cache_get(key)
+                pages.append(cached)
+                if cached is None:
+                    ocr_pending.append((page_number, key, page_pdf))
+
+        if ocr_pending:
+            executor = self._get_executor()
+            # Identical pages are only OCR'd once
+            futures = {}
+            for _, key, page_pdf in ocr_pending:
+                if key not in futures:
+                    futures[key] = executor.submit(_ocr_page, page_pdf, self.dpi, self.language)
+            for page_number, key, _ in ocr_pending:
+                try:
+                    text = futures[key].result()
+                except Exception as e:
+                    # Missing pytesseract/tesseract, OCR failures and crashed workers
+                    raise DocumentIngestionError(f"OCR failed on page {page_number + 1}: {e}") from e
+                self._cache_put(key, text)
+                pages[page_number] = text
+
+        return pages
+
+    def extract_text(self, pdf_path: str) -> str:
+        """
+        Extract the full text of a PDF, ready to be passed to the email agent.
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Returns:
+            Text of all pages joined by blank lines
+        """
+        return "\n\n".join(page.strip() for page in self.extract_pages(pdf_path))
+
+    def close(self) -> None:
+        """Shut down the OCR process pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+_default_ingestor: Optional[DocumentIngestor] = None
+_default_ingestor_lock = threading.Lock()
+
+
+def get_document_ingestor() -> DocumentIngestor:
+    """
+    Get the shared document ingestor, so the OCR pool and page cache are reused.
+
+    Returns:
+        Shared DocumentIngestor instance
+    """
+    global _default_ingestor
+    with _default_ingestor_lock:
+        if _default_ingestor is None:
+            _default_ingestor = DocumentIngestor()
+        return _default_ingestor
+
+
+def extract_document_text(pdf_path: str) -> str:
+    """
+    Extract the text of a PDF order form using the shared ingestor.
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Returns:
+        Extracted document text
+    """
+    return get_document_ingestor().extract_text(pdf_path)
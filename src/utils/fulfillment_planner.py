@@ -0,0 +1,124 @@
+from typing import Dict, List, Any
+
+import numpy as np
+import pandas as pd
+
+from src.utils.similarity_index import ProductSimilarityIndex
+
+
+def _split_across_substitutes(shortfall: int, substitutes: List[Dict], catalog_df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Allocate a shortfall across in-stock substitute products.
+
+    Args:
+        shortfall: Number of units that cannot be shipped from the original product
+        substitutes: Candidate products from the similarity index, best first
+        catalog_df: Product catalog DataFrame with product code as index
+
+    Returns:
+        Dictionary with per-product allocations and the units left unfilled
+    """
+    allocations = []
+    remaining = shortfall
+
+    for substitute in substitutes:
+        if remaining <= 0:
+            break
+        code = substitute["product_code"]
+        allocated = min(remaining, substitute["available_in_stock"])
+        # Skip substitutes whose own MOQ would force us to over-ship
+        if allocated < int(catalog_df.at[code, "Min_Order_Quantity"]):
+            continue
+        allocations.append({
+            "product_code": code,
+            "product_name": substitute["product_name"],
+            "quantity": int(allocated),
+            "price": substitute["price"],
+            "cost": round(allocated * substitute["price"], 2),
+        })
+        remaining -= allocated
+
+    return {
+        "type": "split_with_substitutes",
+        "allocations": allocations,
+        "unfilled": int(remaining),
+    }
+
+
+def plan_fulfillment(verified_products: List[Dict], catalog_df: pd.DataFrame,
+                     similarity_index: ProductSimilarityIndex, max_substitutes: int = 5) -> List[Dict[str, Any]]:
+    """
+    Compute concrete fulfillment options for every order line whose quantity
+    violates the minimum order quantity or exceeds available stock.
+
+    Options are computed for the whole order at once against the catalog
+    columns: round up to the MOQ, ship what is in stock now and backorder
+    the rest, or split the shortfall across in-stock equivalents.
+
+    Args:
+        verified_products: Verified product lines from the lookup agent
+        catalog_df: Product catalog DataFrame with product code as index
+        similarity_index: Index used to find in-stock equivalents
+        max_substitutes: Maximum number of equivalents considered per line
+
+    Returns:
+        List of plans, one per problematic order line
+    """
+    lines = pd.DataFrame([p for p in verified_products if not p.get("quantity_valid", True)])
+    if lines.empty:
+        return []
+
+    catalog = catalog_df.reindex(lines["product_code"])
+    requested = pd.to_numeric(lines["quantity_requested"], errors="coerce").fillna(1).to_numpy(dtype=int)
+    stock = catalog["Available_in_Stock"].to_numpy(dtype=int)
+    moq = catalog["Min_Order_Quantity"].to_numpy(dtype=int)
+    price = catalog["Price"].to_numpy(dtype=float)
+
+    below_moq = requested < moq
+    target = np.maximum(requested, moq)
+    ship_now = np.minimum(target, stock)
+    backorder = target - ship_now
+    exceeds_stock = backorder > 0
+
+    # Look up equivalents for every short line in a single batch
+    short_names = lines.loc[exceeds_stock, "name"].tolist()
+    substitutes = similarity_index.suggest_substitutes(short_names, top_k=max_substitutes + 1)
+
+    plans = []
+    for i, line in enumerate(lines.itertuples(index=False)):
+        issues = []
+        options = []
+
+        if below_moq[i]:
+            issues.append("below_minimum_order_quantity")
+            options.append({
+                "type": "round_up_to_moq",
+                "quantity": int(moq[i]),
+                "additional_units": int(moq[i] - requested[i]),
+                "additional_cost": round(float((moq[i] - requested[i]) * price[i]), 2),
+                "feasible": bool(moq[i] <= stock[i]),
+            })
+
+        if exceeds_stock[i]:
+            issues.append("insufficient_stock")
+            options.append({
+                "type": "ship_and_backorder",
+                "ship_now": int(ship_now[i]),
+                "backorder": int(backorder[i]),
+                "ship_now_cost": round(float(ship_now[i] * price[i]), 2),
+            })
+            equivalents = [
+                s for s in substitutes.get(line.name, [])
+                if s["product_code"] != line.product_code
+            ][:max_substitutes]
+            options.append(_split_across_substitutes(int(backorder[i]), equivalents, catalog_df))
+
+        plans.append({
+            "name": line.name,
+            "product_code": line.product_code,
+            "quantity_requested": int(requested[i]),
+            "issues": issues,
+            "options": options,
+        })
+
+    return plans
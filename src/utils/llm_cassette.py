@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Optional
+
+
+class LLMCassette:
+    """
+    Records LLM prompt/response pairs to a JSON Lines file and replays them by
+    prompt hash, so the pipeline can run offline at full speed.
+
+    Each line holds one call (key, model, temperature, prompt, response). On
+    open, only the byte offset of each key is kept in memory; responses are
+    read from disk when they are replayed.
+    """
+
+    MODES = ("record", "replay")
+
+    def __init__(self, path: str, mode: str = "replay", replay_latency: float = 0.0,
+                 store_prompts: bool = True):
+        """
+        Open a cassette file.
+
+        Args:
+            path: Path to the cassette file
+            mode: "record" to call the LLM and save responses, "replay" to serve saved responses
+            replay_latency: Seconds to sleep before each replayed response (0 for full speed)
+            store_prompts: Whether to save prompt text next to the hash (useful for debugging)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Cassette mode must be one of {self.MODES}, got '{mode}'")
+
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.store_prompts = store_prompts
+        self.misses = 0
+        self._offsets: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            self._build_index()
+        elif mode == "replay":
+            raise FileNotFoundError(f"Cassette not found at: {path}")
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMCassette"]:
+        """
+        Create a cassette from LLM_CASSETTE, LLM_CASSETTE_MODE and LLM_CASSETTE_LATENCY.
+
+        Returns:
+            Configured cassette, or None when LLM_CASSETTE is not set
+        """
+        path = os.environ.get("LLM_CASSETTE")
+        if not path:
+            return None
+        return cls(
+            path,
+            mode=os.environ.get("LLM_CASSETTE_MODE", "replay"),
+            replay_latency=float(os.environ.get("LLM_CASSETTE_LATENCY", "0")),
+        )
+
+    @staticmethod
+    def make_key(prompt: str, model: str, temperature: float) -> str:
+        """
+        Hash a call's prompt together with the model and temperature.
+
+        Args:
+            prompt: Prompt sent to the LLM
+            model: Model name
+            temperature: Sampling temperature
+
+        Returns:
+            Hex digest identifying the call
+        """
+        return hashlib.sha256(f"{model}\x00{temperature}\x00{prompt}".encode()).hexdigest()
+
+    def _build_index(self) -> None:
+        """Record the byte offset of every call in the file; later entries win."""
+        offset = 0
+        with open(self.path, 'rb') as file:
+            for line in file:
+                if line.strip():
+                    self._offsets[json.loads(line)["key"]] = offset
+                offset += len(line)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._offsets
+
+    def get(self, prompt: str, model: str, temperature: float) -> Optional[str]:
+        """
+        Look up a recorded response.
+
+        Args:
+            prompt: Prompt sent to the LLM
+            model: Model name
+            temperature: Sampling temperature
+
+        Returns:
+            Recorded response, or None if the call was never recorded
+        """
+        offset = self._offsets.get(self.make_key(prompt, model, temperature))
+        if offset is None:
+            return None
+        with self._lock, open(self.path, 'rb') as file:
+            file.seek(offset)
+            return json.loads(file.readline())["response"]
+
+    def replay(self, prompt: str, model: str, temperature: float) -> str:
+        """
+        Serve a recorded response, with the configured artificial latency.
+        Unrecorded prompts are counted in `misses`.
+
+        Args:
+            prompt: Prompt sent to the LLM
+            model: Model name
+            temperature: Sampling temperature
+
+        Returns:
+            Recorded response
+        """
+        response = self.get(prompt, model, temperature)
+        if response is None:
+            with self._lock:
+                self.misses += 1
+            raise LookupError(
+                f"No recorded LLM response in {self.path} for this prompt "
+                f"(model={model}, temperature={temperature}); re-record the cassette"
+            )
+        if self.replay_latency > 0:
+            time.sleep(self.replay_latency)
+        return response
+
+    def record(self, prompt: str, model: str, temperature: float, response: str) -> None:
+        """
+        Append a call to the cassette.
+
+        Args:
+            prompt: Prompt sent to the LLM
+            model: Model name
+            temperature: Sampling temperature
+            response: Response returned by the LLM
+        """
+        key = self.make_key(prompt, model, temperature)
+        entry = {"key": key, "model": model, "temperature": temperature, "response": response}
+        if self.store_prompts:
+            entry["prompt"] = prompt
+        line = (json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n").encode()
+
+        with self._lock, open(self.path, 'ab') as file:
+            offset = file.tell()
+            file.write(line)
+            self._offsets[key] = offset
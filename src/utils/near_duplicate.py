@@ -0,0 +1,506 @@
+import os
+import re
+import json
+import zlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where processes sharing an index file are not supported
+    fcntl = None
+
+from src.utils.data_preprocessing import (
+    parse_mime_email,
+    html_to_text,
+    remove_signature_and_disclaimers,
+    HTML_TAG_PATTERN,
+)
+
+
+# Largest prime below 2**32, so (a * x + b) never overflows uint64 for 32-bit inputs
+MERSENNE_LIKE_PRIME = np.uint64(4294967291)
+
+FORWARD_HEADER_PATTERN = re.compile(
+    r'^(?:-{2,}\s*forwarded message\s*-{2,}|begin forwarded message:|(?:from|sent|date|to|cc|subject):.*)$',
+    re.IGNORECASE
+)
+SUBJECT_PREFIX_PATTERN = re.compile(r'^(?:(?:re|fwd?|aw|wg)\s*:\s*)+', re.IGNORECASE)
+GREETING_PATTERN = re.compile(r'^(?:hi|hello|hey|dear|good (?:morning|afternoon|evening)|greetings)\b')
+PRODUCT_LINE_PATTERNS = [
+    re.compile(r'^\s*(?:[-*•]\s*)?(\d+)\s*(?:x|×|pcs|units?)\s+(.+?)\s*$', re.IGNORECASE),
+    re.compile(r'^\s*(?:[-*•]\s*)?(.+?)\s+[x×]\s*(\d+)\s*$', re.IGNORECASE),
+]
+
+
+@contextmanager
+def _file_lock(lock_path: str):
+    """Hold an exclusive lock on a lock file, so processes sharing an index file save one at a time."""
+    with open(lock_path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def normalize_email_lines(email_content: str) -> List[str]:
+    """
+    Normalize an email into comparable lines: markup, quote markers, signatures,
+    forward headers, subject prefixes and short greetings are removed and the text is
+    lowercased with punctuation stripped. Quoted and forwarded text is kept, since
+    forwarded orders often carry all their details there.
+
+    Args:
+        email_content: Raw email content
+
+    Returns:
+        List of normalized, non-empty lines
+    """
+    text = parse_mime_email(email_content)
+    if HTML_TAG_PATTERN.search(text):
+        text = html_to_text(text)
+    text = '\n'.join(line.strip().lstrip('>').strip() for line in text.splitlines())
+    text = remove_signature_and_disclaimers(text)
+
+    lines = []
+    for line in text.splitlines():
+        if not line or FORWARD_HEADER_PATTERN.match(line):
+            continue
+        line = SUBJECT_PREFIX_PATTERN.sub('', line).lower()
+        line = ' '.join(re.findall(r'\w+', line))
+        # Short greeting lines ("Hi team", "Hello there") are dropped wherever they appear
+        if line and not (GREETING_PATTERN.match(line) and len(line.split()) <= 4):
+            lines.append(line)
+    return lines
+
+
+def extract_product_lines(email_content: str) -> Dict[str, int]:
+    """
+    Cheaply parse "9 x Product" or "Product x 9" style order lines, including
+    quoted and forwarded ones.
+
+    Args:
+        email_content: Raw email content
+
+    Returns:
+        Dictionary mapping lowercased product name to quantity
+    """
+    text = parse_mime_email(email_content)
+    if HTML_TAG_PATTERN.search(text):
+        text = html_to_text(text)
+
+    products = {}
+    for line in text.splitlines():
+        line = line.strip().lstrip('>')
+        for index, pattern in enumerate(PRODUCT_LINE_PATTERNS):
+            match = pattern.match(line)
+            if match:
+                quantity, name = match.groups() if index == 0 else reversed(match.groups())
+                products[' '.join(name.lower().split())] = int(quantity)
+                break
+    return products
+
+
+def extract_context_numbers(email_content: str) -> List[str]:
+    """
+    Collect the numbers outside product lines, such as delivery dates, house
+    numbers and ZIP codes, which determine the delivery details of an order.
+
+    Args:
+        email_content: Raw email content
+
+    Returns:
+        Sorted list of numbers as strings
+    """
+    numbers = []
+    for line in normalize_email_lines(email_content):
+        if not any(pattern.match(line) for pattern in PRODUCT_LINE_PATTERNS):
+            numbers.extend(re.findall(r'\d+', line))
+    return sorted(numbers)
+
+
+def patch_order_info(order_info: Dict[str, Any], old_lines: Dict[str, int],
+                     new_lines: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    """
+    Apply the difference between two sets of product lines to a previous extraction.
+
+    Args:
+        order_info: Order extracted from the earlier email
+        old_lines: Product lines of the earlier email
+        new_lines: Product lines of the new email
+
+    Returns:
+        Patched copy of the order, or None if a changed line cannot be matched
+        to a product in the earlier extraction
+    """
+    products = [dict(p) for p in order_info.get("products", [])]
+    by_name = {' '.join(str(p.get("name") or p.get("sku", "")).lower().split()): p for p in products}
+
+    for name, quantity in old_lines.items():
+        if new_lines.get(name) == quantity:
+            continue
+        product = by_name.get(name)
+        if product is None:
+            return None
+        if name in new_lines:
+            product["quantity"] = new_lines[name]
+        else:
+            products.remove(product)
+
+    for name, quantity in new_lines.items():
+        if name not in old_lines:
+            products.append({"name": name, "quantity": quantity})
+
+    return {**order_info, "products": products}
+
+
+def make_dedup_payload(email_content: str, order_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the payload stored in the index for an extracted email.
+
+    Args:
+        email_content: Raw email content
+        order_info: Order extracted from the email
+
+    Returns:
+        Payload with the extraction, parsed product lines and numbers outside them
+    """
+    return {
+        "order_info": order_info,
+        "product_lines": extract_product_lines(email_content),
+        "context_numbers": extract_context_numbers(email_content),
+    }
+
+
+def reuse_order_info(payload: Dict[str, Any], email_content: str) -> Optional[Dict[str, Any]]:
+    """
+    Reuse the extraction of a near-duplicate email, re-checking the product lines.
+
+    The extraction is only reused if the numbers outside product lines are
+    identical in both emails, since a changed number there may be a new
+    delivery date or address (or a quantity hidden in free text), and if the
+    emails have parsable product lines, since otherwise nothing shows that
+    they order the same products.
+
+    Args:
+        payload: Payload stored for the near-duplicate
+        email_content: Raw content of the new email
+
+    Returns:
+        Order for the new email, or None if it must be extracted again
+    """
+    # Payloads saved before context numbers were stored never match
+    if extract_context_numbers(email_content) != payload.get("context_numbers"):
+        return None
+
+    new_lines = extract_product_lines(email_content)
+    old_lines = payload["product_lines"]
+    if not new_lines or not old_lines:
+        return None
+    if new_lines == old_lines:
+        return payload["order_info"]
+    return patch_order_info(payload["order_info"], old_lines, new_lines)
+
+
+class NearDuplicateIndex:
+    """
+    Bounded MinHash + LSH index of processed emails, used to reuse the extraction
+    of forwarded or lightly edited resubmissions instead of calling the LLM again.
+
+    Signatures live in a fixed-size ring buffer, so memory is bounded by
+    capacity. Band hashes are kept in per-band sorted arrays searched with
+    np.searchsorted, with a small dictionary for recent inserts that is merged
+    into the sorted arrays in batches.
+    """
+
+    def __init__(self, capacity: int = 100_000, num_perm: int = 64, bands: int = 16,
+                 threshold: float = 0.8, shingle_size: int = 3, merge_every: int = 10_000, seed: int = 1):
+        """
+        Initialize the index.
+
+        Args:
+            capacity: Maximum number of stored emails; the oldest are evicted first
+            num_perm: Number of MinHash permutations
+            bands: Number of LSH bands (must divide num_perm)
+            threshold: Minimum estimated Jaccard similarity for a near-duplicate
+            shingle_size: Number of words per shingle
+            merge_every: Number of recent inserts kept in the unsorted buffer
+            seed: Seed for the hash permutations
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.capacity = capacity
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.merge_every = merge_every
+        self.seed = seed
+
+        rng = np.random.RandomState(seed)
+        self._perm_a = rng.randint(1, 2**32 - 1, size=num_perm, dtype=np.uint64)
+        self._perm_b = rng.randint(0, 2**32 - 1, size=num_perm, dtype=np.uint64)
+        self._band_multipliers = rng.randint(1, 2**63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._band_salts = rng.randint(0, 2**63, size=bands, dtype=np.uint64)
+
+        self.signatures = np.zeros((capacity, num_perm), dtype=np.uint32)
+        self.band_hashes = np.zeros((capacity, bands), dtype=np.uint32)
+        self.payloads: List[Optional[Any]] = [None] * capacity
+        self.size = 0
+        self._next_slot = 0
+
+        self._sorted_hashes = [np.empty(0, dtype=np.uint32) for _ in range(bands)]
+        self._sorted_slots = [np.empty(0, dtype=np.int64) for _ in range(bands)]
+        self._recent: Dict[Tuple[int, int], List[int]] = {}
+        self._recent_count = 0
+        self._unsaved_slots: List[np.ndarray] = []
+        self._lock = threading.Lock()
+
+    def signature(self, email_content: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of an email's normalized shingles.
+        Shingles are built per line, so reordered product lists keep their shingles.
+
+        Args:
+            email_content: Raw email content
+
+        Returns:
+            Signature array of shape (num_perm,)
+        """
+        shingles = set()
+        for line in normalize_email_lines(email_content):
+            words = line.split()
+            if len(words) <= self.shingle_size:
+                shingles.add(line)
+            else:
+                shingles.update(' '.join(words[i:i + self.shingle_size])
+                                for i in range(len(words) - self.shingle_size + 1))
+        if not shingles:
+            shingles.add('')
+
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = (hashes[:, None] * self._perm_a + self._perm_b) % MERSENNE_LIKE_PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_hashes(self, signatures: np.ndarray) -> np.ndarray:
+        """Hash each band of one or more signatures to 32 bits."""
+        bands = signatures.reshape(-1, self.bands, self.rows).astype(np.uint64)
+        combined = (bands * self._band_multipliers).sum(axis=2) + self._band_salts
+        return (combined >> np.uint64(32)).astype(np.uint32)
+
+    def add(self, email_content: str, payload: Any) -> int:
+        """
+        Store an email's signature together with its payload.
+
+        Args:
+            email_content: Raw email content
+            payload: Data to return for near-duplicates, e.g. the extracted order
+
+        Returns:
+            Slot where the email was stored
+        """
+        return self.add_signatures(self.signature(email_content)[None, :], [payload])[0]
+
+    def add_signatures(self, signatures: np.ndarray, payloads: List[Any]) -> List[int]:
+        """
+        Store precomputed signatures in bulk, evicting the oldest entries when full.
+
+        Args:
+            signatures: Array of shape (n, num_perm)
+            payloads: One payload per signature
+
+        Returns:
+            Slots where the signatures were stored
+        """
+        band_hashes = self._band_hashes(signatures)
+        with self._lock:
+            slots = (self._next_slot + np.arange(len(signatures))) % self.capacity
+            self.signatures[slots] = signatures
+            self.band_hashes[slots] = band_hashes
+            for slot, payload in zip(slots.tolist(), payloads):
+                self.payloads[slot] = payload
+            self._next_slot = int((self._next_slot + len(signatures)) % self.capacity)
+            self.size = min(self.capacity, self.size + len(signatures))
+            self._unsaved_slots.append(slots)
+
+            if len(signatures) >= self.merge_every:
+                self._merge(extra_slots=slots)
+            else:
+                for slot, row in zip(slots.tolist(), band_hashes.tolist()):
+                    for band, value in enumerate(row):
+                        self._recent.setdefault((band, value), []).append(slot)
+                self._recent_count += len(signatures)
+                if self._recent_count >= self.merge_every:
+                    self._merge()
+        return slots.tolist()
+
+    def _merge(self, extra_slots: Optional[np.ndarray] = None) -> None:
+        """
+        Fold recent inserts into the sorted band arrays, dropping entries whose
+        slot has since been overwritten.
+        """
+        recent_slots = np.unique(np.fromiter(
+            (slot for slots in self._recent.values() for slot in slots), dtype=np.int64
+        ))
+        if extra_slots is not None:
+            recent_slots = np.union1d(recent_slots, extra_slots.astype(np.int64))
+
+        for band in range(self.bands):
+            slots = self._sorted_slots[band]
+            hashes = self._sorted_hashes[band]
+            # Entries are stale when their slot was reused since they were indexed
+            live = (self.band_hashes[slots, band] == hashes) & ~np.isin(slots, recent_slots)
+            slots = np.concatenate([slots[live], recent_slots])
+            hashes = np.concatenate([hashes[live], self.band_hashes[recent_slots, band]])
+            order = np.argsort(hashes, kind='stable')
+            self._sorted_slots[band] = slots[order]
+            self._sorted_hashes[band] = hashes[order]
+
+        self._recent = {}
+        self._recent_count = 0
+
+    def query_signature(self, signature: np.ndarray) -> Optional[Tuple[Any, float]]:
+        """
+        Find the most similar stored email above the threshold.
+
+        Args:
+            signature: MinHash signature of the new email
+
+        Returns:
+            Tuple of the stored payload and estimated similarity, or None
+        """
+        band_hashes = self._band_hashes(signature[None, :])[0]
+        with self._lock:
+            candidates = []
+            for band, value in enumerate(band_hashes):
+                hashes = self._sorted_hashes[band]
+                left = np.searchsorted(hashes, value, side='left')
+                right = np.searchsorted(hashes, value, side='right')
+                candidates.append(self._sorted_slots[band][left:right])
+                candidates.append(np.array(self._recent.get((band, int(value)), []), dtype=np.int64))
+
+            candidates = np.unique(np.concatenate(candidates))
+            if not len(candidates):
+                return None
+            # Band hashes are checked again because sorted entries may point at reused slots
+            matches_band = (self.band_hashes[candidates] == band_hashes).any(axis=1)
+            candidates = candidates[matches_band]
+            if not len(candidates):
+                return None
+
+            similarity = (self.signatures[candidates] == signature).mean(axis=1)
+            best = int(np.argmax(similarity))
+            if similarity[best] < self.threshold:
+                return None
+            return self.payloads[candidates[best]], float(similarity[best])
+
+    def query(self, email_content: str) -> Optional[Tuple[Any, float]]:
+        """
+        Find the most similar stored email above the threshold.
+
+        Args:
+            email_content: Raw email content
+
+        Returns:
+            Tuple of the stored payload and estimated similarity, or None
+        """
+        return self.query_signature(self.signature(email_content))
+
+    def save(self, path: str) -> None:
+        """
+        Persist the index to a compressed .npz file. Payloads must be JSON serializable;
+        they are stored as one newline-separated byte blob.
+
+        Args:
+            path: Destination file path
+        """
+        with self._lock:
+            used = np.array([p is not None for p in self.payloads])
+            np.savez_compressed(
+                path,
+                config=np.array(json.dumps({
+                    "capacity": self.capacity, "num_perm": self.num_perm, "bands": self.bands,
+                    "threshold": self.threshold, "shingle_size": self.shingle_size,
+                    "merge_every": self.merge_every, "seed": self.seed,
+                    "next_slot": self._next_slot, "size": self.size,
+                })),
+                slots=np.flatnonzero(used),
+                signatures=self.signatures[used],
+                payloads=np.frombuffer(
+                    '\n'.join(json.dumps(p) for p in self.payloads if p is not None).encode(), dtype=np.uint8
+                ),
+            )
+
+    def save_updates(self, path: str) -> int:
+        """
+        Merge the entries added since the last call into the index file at path.
+        The file is re-read under a lock and only this process's new entries are
+        added before it is atomically replaced, so several processes (such as
+        pre-fork workers) can share one file without overwriting each other.
+
+        Args:
+            path: Path to the .npz file
+
+        Returns:
+            Number of entries written
+        """
+        with self._lock:
+            if not self._unsaved_slots:
+                return 0
+            pending, self._unsaved_slots = self._unsaved_slots, []
+            slots = np.unique(np.concatenate(pending))
+            signatures = self.signatures[slots].copy()
+            payloads = [self.payloads[slot] for slot in slots.tolist()]
+
+        try:
+            with _file_lock(path + ".lock"):
+                if os.path.exists(path):
+                    stored = NearDuplicateIndex.load(path)
+                else:
+                    stored = NearDuplicateIndex(capacity=self.capacity, num_perm=self.num_perm, bands=self.bands,
+                                                threshold=self.threshold, shingle_size=self.shingle_size,
+                                                merge_every=self.merge_every, seed=self.seed)
+                stored.add_signatures(signatures, payloads)
+                temp_path = path + ".tmp.npz"
+                stored.save(temp_path)
+                os.replace(temp_path, path)
+        except Exception:
+            with self._lock:
+                self._unsaved_slots.insert(0, slots)
+            raise
+        return len(slots)
+
+    @classmethod
+    def load(cls, path: str) -> "NearDuplicateIndex":
+        """
+        Load an index saved with save().
+
+        Args:
+            path: Path to the .npz file
+
+        Returns:
+            Restored index
+        """
+        with np.load(path) as data:
+            config = json.loads(str(data["config"]))
+            index = cls(capacity=config["capacity"], num_perm=config["num_perm"], bands=config["bands"],
+                        threshold=config["threshold"], shingle_size=config["shingle_size"],
+                        merge_every=config["merge_every"], seed=config["seed"])
+            slots = data["slots"]
+            index.signatures[slots] = data["signatures"]
+            index.band_hashes[slots] = index._band_hashes(data["signatures"])
+            payloads = data["payloads"]
+            # Files saved before payloads were stored as a byte blob hold a string array
+            payloads = payloads.tolist() if payloads.dtype.kind == 'U' else payloads.tobytes().decode().split('\n')
+            for slot, payload in zip(slots.tolist(), payloads):
+                index.payloads[slot] = json.loads(payload)
+
+        index.size = config["size"]
+        index._next_slot = config["next_slot"]
+        index._merge(extra_slots=slots)
+        return index
@@ -0,0 +1,103 @@
+import os
+import time
+import pstats
+import cProfile
+import tracemalloc
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Any
+
+
+# Profiles are written to data/profiles unless another directory is given
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "profiles")
+
+# Functions whose cumulative time is reported per category, as (path fragment, function name)
+PROFILE_CATEGORIES = {
+    "llm_wait": [("config.py", "generate_completion")],
+    "json_parsing": [("json", "loads"), ("json", "dumps")],
+    "pandas_matching": [("lookup_agent.py", "_manual_product_verification")],
+}
+
+# tracemalloc is process-wide, so profiled runs take turns instead of stopping each other's tracing
+_profile_lock = threading.Lock()
+
+
+def summarize_categories(stats: pstats.Stats) -> Dict[str, float]:
+    """
+    Sum the cumulative time spent in each profile category.
+
+    Args:
+        stats: Loaded profile statistics
+
+    Returns:
+        Dictionary mapping category name to seconds spent
+    """
+    totals = {category: 0.0 for category in PROFILE_CATEGORIES}
+    for (filename, _, function_name), (_, _, _, cumulative, _) in stats.stats.items():
+        path = filename.replace(os.sep, "/")
+        for category, targets in PROFILE_CATEGORIES.items():
+            if any(function_name == name and fragment in path for fragment, name in targets):
+                totals[category] += cumulative
+    return {category: round(seconds, 6) for category, seconds in totals.items()}
+
+
+@contextmanager
+def profile_run(label: str, output_dir: str = DEFAULT_PROFILE_DIR) -> Iterator[Dict[str, Any]]:
+    """
+    Profile the enclosed block with cProfile and tracemalloc and save the results.
+
+    The CPU profile is written as a pstats file, loadable with pstats, snakeviz
+    or flameprof (for flamegraphs); the top memory allocations are written
+    next to it as text. The yielded dictionary is filled with the report when
+    the block exits. Concurrent profiled runs (e.g. threaded requests) wait for
+    each other, since memory tracing is global to the process.
+
+    Args:
+        label: Name used in the output file names, e.g. the email filename
+        output_dir: Directory where profile files are written
+
+    Yields:
+        Dictionary that receives the file names (relative to output_dir), timings
+        and category summary
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = f"{os.path.splitext(os.path.basename(label))[0] or 'run'}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    profile_path = os.path.join(output_dir, f"{base_name}.prof")
+    memory_path = os.path.join(output_dir, f"{base_name}.memory.txt")
+
+    report: Dict[str, Any] = {}
+    with _profile_lock:
+        tracing_memory = not tracemalloc.is_tracing()
+        if tracing_memory:
+            tracemalloc.start()
+        else:
+            # Tracing was started elsewhere (e.g. PYTHONTRACEMALLOC); measure this run's peak only
+            tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield report
+        finally:
+            profiler.disable()
+            wall_time = time.perf_counter() - start
+
+            snapshot = tracemalloc.take_snapshot()
+            _, peak_memory = tracemalloc.get_traced_memory()
+            if tracing_memory:
+                tracemalloc.stop()
+
+            profiler.dump_stats(profile_path)
+            with open(memory_path, 'w') as file:
+                for stat in snapshot.statistics('lineno')[:25]:
+                    file.write(f"{stat}\n")
+
+            report.update({
+                "profile_file": os.path.basename(profile_path),
+                "memory_file": os.path.basename(memory_path),
+                "wall_time": round(wall_time, 6),
+                "peak_memory_bytes": peak_memory,
+                "categories": summarize_categories(pstats.Stats(profiler)),
+            })
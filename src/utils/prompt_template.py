@@ -1,5 +1,7 @@
 from typing import Dict, List, Optional
 
+from src.utils.serialization import dumps
+
 # Template for email parsing to extract purchase information
 EMAIL_PARSING_TEMPLATE = """
 You are an AI assistant specialized in analyzing purchase request emails.
@@ -134,5 +136,5 @@ def get_solution_generation_prompt(validation_results: Dict) -> str:
         Formatted prompt for the LLM
     """
     return SOLUTION_GENERATION_TEMPLATE.format(
-        validation_results=str(validation_results)
+        validation_results=dumps(validation_results)
     )
\ No newline at end of file
@@ -0,0 +1,341 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Any
+
+from src.utils.serialization import dumps
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email_filename TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    delivery_date TEXT,
+    processing_time REAL,
+    created_at REAL NOT NULL,
+    total_price REAL,
+    products_missing INTEGER NOT NULL DEFAULT 0,
+    result TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS order_products (
+    order_id INTEGER NOT NULL REFERENCES orders(id),
+    product_code TEXT,
+    product_name TEXT,
+    missing INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_orders_filename ON orders(email_filename);
+CREATE INDEX IF NOT EXISTS idx_orders_success ON orders(success, id);
+CREATE INDEX IF NOT EXISTS idx_orders_missing ON orders(products_missing, id);
+CREATE INDEX IF NOT EXISTS idx_orders_delivery_date ON orders(delivery_date);
+CREATE INDEX IF NOT EXISTS idx_orders_processing_time ON orders(processing_time);
+CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at);
+CREATE INDEX IF NOT EXISTS idx_order_products_code ON order_products(product_code, order_id);
+CREATE INDEX IF NOT EXISTS idx_order_products_order ON order_products(order_id);
+"""
+
+# Columns returned by list queries; the full result JSON is only loaded by get()
+SUMMARY_COLUMNS = (
+    "id", "email_filename", "success", "delivery_date", "processing_time",
+    "created_at", "total_price", "products_missing",
+)
+
+# Largest page returned by query()
+MAX_QUERY_LIMIT = 500
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    """Return value if it is a dictionary, otherwise an empty one."""
+    return value if isinstance(value, dict) else {}
+
+
+def _make_row(result: Dict[str, Any], processing_time: Optional[float], created_at: float) -> tuple:
+    """
+    Build the orders row and order_products rows for a result. Malformed
+    fields (e.g. a delivery given as a string) are stored as missing.
+
+    Args:
+        result: Final result from the orchestrator
+        processing_time: Time taken to process the email, in seconds
+        created_at: Time the result was added (Unix seconds)
+
+    Returns:
+        Tuple of the orders column values and the (product_code, name, missing) rows
+    """
+    validation = _as_dict(result.get("validation"))
+    delivery = _as_dict(_as_dict(result.get("order")).get("delivery"))
+    try:
+        total_price = float(_as_dict(result.get("summary")).get("total_price") or 0)
+    except (TypeError, ValueError):
+        total_price = 0.0
+    missing_products = validation.get("missing_products") or []
+    if not isinstance(missing_products, list):
+        missing_products = []
+    verified_products = validation.get("verified_products") or []
+    if not isinstance(verified_products, list):
+        verified_products = []
+
+    order = (
+        str(result.get("email_filename") or "unknown.txt"),
+        int(bool(result.get("success"))),
+        None if delivery.get("date") is None else str(delivery["date"]),
+        processing_time,
+        created_at,
+        total_price,
+        len(missing_products),
+        dumps(result),
+    )
+    products = [
+        (str(p.get("product_code")), str(p.get("name")), 0)
+        for p in verified_products if isinstance(p, dict)
+    ] + [
+        (None, str(name), 1)
+        for name in missing_products
+    ]
+    return order, products
+
+
+class ResultStore:
+    """
+    Persistent SQLite store for order processing results. Writes are buffered
+    and committed in batches in WAL mode by the adding thread once a batch is
+    full, or by a background thread once the oldest buffered result reaches
+    flush_interval. Results are serialized when they are added, so later
+    changes to a result dictionary are not stored. Reads use keyset pagination so list queries stay fast
+    regardless of how many orders are stored. Call close() on shutdown to write
+    the last partial batch.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 100, flush_interval: float = 1.0):
+        """
+        Initialize the result store.
+
+        Args:
+            db_path: Path to the SQLite database file
+            batch_size: Number of buffered results that triggers a write
+            flush_interval: Age in seconds of the oldest buffered result at which the
+                background thread writes the buffer
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: List[tuple] = []
+        self._buffer_started = 0.0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._flusher_pid: Optional[int] = None
+        self._stop_flusher = threading.Event()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Return the connection for this process, reconnecting after a fork since
+        SQLite connections must not be shared between processes.
+        """
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def _start_flusher(self) -> None:
+        """
+        Start the background flush thread for this process. Threads do not
+        survive a fork, so each worker process starts its own.
+        """
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._stop_flusher = threading.Event()
+            threading.Thread(target=self._flush_periodically, args=(self._stop_flusher,),
+                             name="result-store-flusher", daemon=True).start()
+
+    def _flush_periodically(self, stop: threading.Event) -> None:
+        """Write the buffer whenever its oldest result reaches flush_interval, until stopped."""
+        while True:
+            with self._lock:
+                if self._buffer:
+                    timeout = self._buffer_started + self.flush_interval - time.time()
+                else:
+                    timeout = self.flush_interval
+            if stop.wait(max(timeout, 0.0)):
+                return
+            with self._lock:
+                due = bool(self._buffer) and time.time() - self._buffer_started >= self.flush_interval
+            if due:
+                self.flush()
+
+    def add(self, result: Dict[str, Any], processing_time: Optional[float] = None) -> None:
+        """
+        Buffer a final processing result for writing.
+
+        Args:
+            result: Final result from the orchestrator
+            processing_time: Time taken to process the email, in seconds
+        """
+        self._start_flusher()
+        row = _make_row(result, processing_time, time.time())
+        with self._lock:
+            if not self._buffer:
+                self._buffer_started = time.time()
+            self._buffer.append(row)
+            should_flush = (
+                len(self._buffer) >= self.batch_size
+                or time.time() - self._buffer_started >= self.flush_interval
+            )
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write all buffered results in a single transaction. If the write fails,
+        the results are put back into the buffer and the error is raised.
+        """
+        with self._lock:
+            if not self._buffer:
+                return
+            pending, self._buffer = self._buffer, []
+
+            try:
+                connection = self._connect()
+                with connection:
+                    for order, products in pending:
+                        cursor = connection.execute(
+                            "INSERT INTO orders (email_filename, success, delivery_date, processing_time, "
+                            "created_at, total_price, products_missing, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            order
+                        )
+                        order_id = cursor.lastrowid
+                        connection.executemany(
+                            "INSERT INTO order_products (order_id, product_code, product_name, missing) "
+                            "VALUES (?, ?, ?, ?)",
+                            [(order_id, *product) for product in products]
+                        )
+            except Exception:
+                self._buffer = pending + self._buffer
+                self._buffer_started = min(order[4] for order, _ in self._buffer)
+                raise
+
+    def get(self, order_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a stored order with its full result.
+
+        Args:
+            order_id: Id of the stored order
+
+        Returns:
+            Stored order, or None if it does not exist
+        """
+        self.flush()
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)}, result FROM orders WHERE id = ?", (order_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        order = dict(zip(SUMMARY_COLUMNS, row[:-1]))
+        order["success"] = bool(order["success"])
+        order["result"] = json.loads(row[-1])
+        return order
+
+    def query(self, email_filename: Optional[str] = None, success: Optional[bool] = None,
+              has_missing_products: Optional[bool] = None, product_code: Optional[str] = None,
+              delivery_date_from: Optional[str] = None, delivery_date_to: Optional[str] = None,
+              created_from: Optional[float] = None, created_to: Optional[float] = None,
+              min_processing_time: Optional[float] = None,
+              limit: int = 50, cursor: Optional[int] = None) -> Dict[str, Any]:
+        """
+        List stored orders matching the given filters, newest first.
+
+        Args:
+            email_filename: Exact email filename
+            success: Only successful (True) or failed (False) orders
+            has_missing_products: Only orders with (True) or without (False) missing products
+            product_code: Only orders containing this product code
+            delivery_date_from: Earliest delivery date (YYYY-MM-DD)
+            delivery_date_to: Latest delivery date (YYYY-MM-DD)
+            created_from: Earliest processing timestamp (Unix seconds)
+            created_to: Latest processing timestamp (Unix seconds)
+            min_processing_time: Only orders that took at least this many seconds
+            limit: Maximum number of orders returned, clamped to 1..MAX_QUERY_LIMIT
+            cursor: Value of next_cursor from the previous page
+
+        Returns:
+            Dictionary with the page of orders and the cursor for the next page
+        """
+        conditions = []
+        params: List[Any] = []
+
+        if email_filename is not None:
+            conditions.append("email_filename = ?")
+            params.append(email_filename)
+        if success is not None:
+            conditions.append("success = ?")
+            params.append(int(success))
+        if has_missing_products is not None:
+            conditions.append("products_missing > 0" if has_missing_products else "products_missing = 0")
+        if product_code is not None:
+            conditions.append("id IN (SELECT order_id FROM order_products WHERE product_code = ?)")
+            params.append(product_code)
+        if delivery_date_from is not None:
+            conditions.append("delivery_date >= ?")
+            params.append(delivery_date_from)
+        if delivery_date_to is not None:
+            conditions.append("delivery_date <= ?")
+            params.append(delivery_date_to)
+        if created_from is not None:
+            conditions.append("created_at >= ?")
+            params.append(created_from)
+        if created_to is not None:
+            conditions.append("created_at <= ?")
+            params.append(created_to)
+        if min_processing_time is not None:
+            conditions.append("processing_time >= ?")
+            params.append(min_processing_time)
+        # Keyset pagination: seek past the last id instead of using OFFSET
+        if cursor is not None:
+            conditions.append("id < ?")
+            params.append(cursor)
+
+        limit = max(1, min(limit, MAX_QUERY_LIMIT))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM orders {where} ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        self.flush()
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+
+        orders = []
+        for row in rows:
+            order = dict(zip(SUMMARY_COLUMNS, row))
+            order["success"] = bool(order["success"])
+            orders.append(order)
+
+        return {
+            "orders": orders,
+            "next_cursor": orders[-1]["id"] if len(orders) == limit else None,
+        }
+
+    def close(self) -> None:
+        """Stop the background flush thread, flush buffered results and close the connection."""
+        self._stop_flusher.set()
+        self._flusher_pid = None
+        self.flush()
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
@@ -0,0 +1,273 @@
+import re
+import time
+import heapq
+import datetime
+import itertools
+import threading
+from typing import Callable, Dict, List, Optional, Any
+
+from src.utils.data_preprocessing import parse_mime_email, strip_quoted_replies
+
+
+DAY = 24 * 60 * 60
+
+# How far ahead each customer tier is moved, in seconds of deadline credit
+DEFAULT_TIER_CREDITS = {
+    "platinum": 3 * DAY,
+    "gold": 2 * DAY,
+    "silver": 1 * DAY,
+    "standard": 0,
+}
+
+MONTHS = {
+    name: index + 1
+    for index, names in enumerate([
+        ("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"),
+        ("may",), ("june", "jun"), ("july", "jul"), ("august", "aug"),
+        ("september", "sep", "sept"), ("october", "oct"), ("november", "nov"), ("december", "dec"),
+    ])
+    for name in names
+}
+MONTH_NAMES = '|'.join(sorted(MONTHS, key=len, reverse=True))
+
+ISO_DATE_PATTERN = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')
+US_DATE_PATTERN = re.compile(r'\b(\d{1,2})/(\d{1,2})/(\d{4})\b')
+MONTH_DAY_PATTERN = re.compile(rf'\b({MONTH_NAMES})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?\b', re.IGNORECASE)
+DAY_MONTH_PATTERN = re.compile(rf'\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({MONTH_NAMES})\.?(?:,?\s+(\d{{4}}))?\b', re.IGNORECASE)
+URGENT_PATTERN = re.compile(r'\b(?:asap|urgent(?:ly)?|immediately|(?:by|for) (?:the )?(?:end of )?today)\b', re.IGNORECASE)
+TOMORROW_PATTERN = re.compile(r'\b(?:by|for) tomorrow\b', re.IGNORECASE)
+# Words shortly before a date that mark it as the delivery deadline rather than a reference date
+DEADLINE_CUE_PATTERN = re.compile(
+    r'\b(?:by|before|deliver(?:y|ed)?|need(?:ed)?|due|until|no later than|latest)\b[^.\n]{0,25}$',
+    re.IGNORECASE
+)
+SENDER_PATTERN = re.compile(r'^From:.*?([\w.+-]+@([\w-]+(?:\.[\w-]+)+))', re.IGNORECASE | re.MULTILINE)
+
+
+def _make_date(year: int, month: int, day: int) -> Optional[datetime.date]:
+    """Build a date, returning None for impossible dates such as 31/02."""
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_deadline(email_content: str, today: Optional[datetime.date] = None) -> Optional[datetime.date]:
+    """
+    Cheaply find the delivery deadline in an email before LLM extraction.
+    Recognizes ISO and US dates, "June 20, 2025" / "20 June" style dates and
+    "ASAP", "urgent", "by today" and "by tomorrow". Headers and quoted replies
+    are skipped so sent dates are not mistaken for deadlines. Dates before
+    today are ignored and dates without a year roll forward to their next
+    occurrence. Dates following "by", "before", "deliver", "need" and similar
+    words are preferred; the earliest remaining date wins.
+
+    Args:
+        email_content: Raw email content
+        today: Reference date for relative expressions and year-less dates
+
+    Returns:
+        Deadline date, or None if no deadline was found
+    """
+    today = today or datetime.date.today()
+    text = strip_quoted_replies(parse_mime_email(email_content))
+
+    # (date, whether a deadline cue precedes it)
+    candidates: List[tuple] = []
+
+    def add(match: re.Match, year: str, month: int, day: str) -> None:
+        date = _make_date(int(year) if year else today.year, month, int(day))
+        if date is not None and not year and date < today:
+            date = _make_date(today.year + 1, month, int(day))
+        if date is not None and date >= today:
+            cued = DEADLINE_CUE_PATTERN.search(text, max(0, match.start() - 40), match.start()) is not None
+            candidates.append((date, cued))
+
+    for match in ISO_DATE_PATTERN.finditer(text):
+        year, month, day = match.groups()
+        add(match, year, int(month), day)
+    for match in US_DATE_PATTERN.finditer(text):
+        month, day, year = match.groups()
+        add(match, year, int(month), day)
+    for match in MONTH_DAY_PATTERN.finditer(text):
+        month_name, day, year = match.groups()
+        add(match, year, MONTHS[month_name.lower()], day)
+    for match in DAY_MONTH_PATTERN.finditer(text):
+        day, month_name, year = match.groups()
+        add(match, year, MONTHS[month_name.lower()], day)
+
+    if URGENT_PATTERN.search(text):
+        candidates.append((today, True))
+    if TOMORROW_PATTERN.search(text):
+        candidates.append((today + datetime.timedelta(days=1), True))
+
+    cued = [date for date, is_cued in candidates if is_cued]
+    dates = cued or [date for date, _ in candidates]
+    return min(dates) if dates else None
+
+
+def parse_sender(email_content: str) -> Optional[str]:
+    """
+    Find the sender address in the email headers (before the first blank line), if present.
+
+    Args:
+        email_content: Raw email content
+
+    Returns:
+        Lowercased sender address, or None
+    """
+    match = SENDER_PATTERN.search(email_content.replace('\r\n', '\n').split('\n\n', 1)[0])
+    return match.group(1).lower() if match else None
+
+
+class PriorityOrderQueue:
+    """
+    Heap-based queue of emails waiting to be processed, ordered by delivery
+    deadline and customer tier, with aging so orders without a deadline are
+    not starved.
+
+    Each order gets a virtual deadline: its parsed delivery deadline, capped
+    at the time it was queued plus the aging horizon, minus the credit of its
+    customer tier. Because the key is an absolute time, waiting orders move
+    forward relative to newer ones without ever re-heapifying.
+    """
+
+    def __init__(self, customer_tiers: Optional[Dict[str, str]] = None,
+                 tier_credits: Optional[Dict[str, float]] = None,
+                 aging_horizon: float = 7 * DAY, urgent_within: float = 2 * DAY,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize the queue.
+
+        Args:
+            customer_tiers: Mapping of sender address or domain to tier name
+            tier_credits: Seconds of deadline credit per tier name
+            aging_horizon: Longest time an order is scheduled behind newer work
+            urgent_within: Orders due within this many seconds are reported as urgent
+            clock: Time source, in Unix seconds
+        """
+        self.customer_tiers = {key.lower(): tier for key, tier in (customer_tiers or {}).items()}
+        self.tier_credits = tier_credits or DEFAULT_TIER_CREDITS
+        self.aging_horizon = aging_horizon
+        self.urgent_within = urgent_within
+        self.clock = clock
+
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._completed: Dict[str, List[float]] = {}
+
+    def customer_tier(self, email_content: str) -> str:
+        """
+        Look up the customer tier of an email's sender, by address then domain.
+
+        Args:
+            email_content: Raw email content
+
+        Returns:
+            Tier name, "standard" when the sender is unknown
+        """
+        sender = parse_sender(email_content)
+        if sender is None:
+            return "standard"
+        return self.customer_tiers.get(sender) or self.customer_tiers.get(sender.split('@', 1)[1], "standard")
+
+    def push(self, email_filename: str, email_content: str) -> Dict[str, Any]:
+        """
+        Queue an email for processing.
+
+        Args:
+            email_filename: Name of the email file
+            email_content: Raw email content
+
+        Returns:
+            Queue entry with its scheduling metadata
+        """
+        enqueued_at = self.clock()
+        deadline = parse_deadline(email_content, datetime.date.fromtimestamp(enqueued_at))
+        tier = self.customer_tier(email_content)
+
+        deadline_at = None
+        if deadline is not None:
+            deadline_at = datetime.datetime.combine(deadline, datetime.time()).timestamp()
+        virtual_deadline = min(deadline_at if deadline_at is not None else float('inf'),
+                               enqueued_at + self.aging_horizon)
+        priority = virtual_deadline - self.tier_credits.get(tier, 0)
+
+        if deadline_at is None:
+            priority_class = "unscheduled"
+        elif deadline_at - enqueued_at <= self.urgent_within:
+            priority_class = "urgent"
+        else:
+            priority_class = "scheduled"
+
+        entry = {
+            "email_filename": email_filename,
+            "email_content": email_content,
+            "deadline": deadline.isoformat() if deadline else None,
+            "customer_tier": tier,
+            "priority_class": priority_class,
+            "priority": priority,
+            "enqueued_at": enqueued_at,
+        }
+        with self._condition:
+            heapq.heappush(self._heap, (priority, next(self._counter), entry))
+            self._condition.notify()
+        return entry
+
+    def pop(self, block: bool = False, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Take the most urgent queued email.
+
+        Args:
+            block: Wait for an email if the queue is empty
+            timeout: Maximum seconds to wait when blocking
+
+        Returns:
+            Queue entry, or None if the queue is empty
+        """
+        with self._condition:
+            if block:
+                self._condition.wait_for(lambda: self._heap, timeout=timeout)
+            if not self._heap:
+                return None
+            return heapq.heappop(self._heap)[2]
+
+    def mark_done(self, entry: Dict[str, Any]) -> float:
+        """
+        Record that a queued email has been processed.
+
+        Args:
+            entry: Queue entry returned by pop()
+
+        Returns:
+            Time from queueing to result, in seconds
+        """
+        time_to_result = self.clock() - entry["enqueued_at"]
+        with self._condition:
+            self._completed.setdefault(entry["priority_class"], []).append(time_to_result)
+        return time_to_result
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize time-to-result per priority class.
+
+        Returns:
+            Dictionary mapping priority class to count, mean, p50, p95 and max seconds
+        """
+        summary = {}
+        with self._condition:
+            for priority_class, times in self._completed.items():
+                ordered = sorted(times)
+                summary[priority_class] = {
+                    "count": len(ordered),
+                    "mean": round(sum(ordered) / len(ordered), 3),
+                    "p50": round(ordered[int(0.50 * (len(ordered) - 1))], 3),
+                    "p95": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+                    "max": round(ordered[-1], 3),
+                }
+        return summary
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._heap)
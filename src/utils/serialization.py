@@ -0,0 +1,129 @@
+import json
+import math
+import datetime
+from typing import Any, Iterable, Dict
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def to_native(obj: Any) -> Any:
+    """
+    Recursively convert NumPy/pandas values to plain Python types so results
+    can be encoded by any JSON backend. NaN and missing values become None.
+
+    Args:
+        obj: Result structure to convert
+
+    Returns:
+        Equivalent structure built from dict, list, str, int, float, bool and None
+    """
+    # Exact type checks: np.float64 subclasses float but orjson rejects it
+    obj_type = type(obj)
+    if obj is None or obj_type is str or obj_type is bool or obj_type is int:
+        return obj
+    if obj_type is float:
+        return None if math.isnan(obj) else obj
+    if isinstance(obj, dict):
+        return {str(key): to_native(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple, set)):
+        return [to_native(value) for value in obj]
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return None if np.isnan(obj) else float(obj)
+    if isinstance(obj, np.ndarray):
+        return to_native(obj.tolist())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return to_native(obj.tolist())
+    if isinstance(obj, (pd.Timestamp, datetime.date, datetime.datetime)):
+        return None if pd.isna(obj) else obj.isoformat()
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    return str(obj)
+
+
+def _orjson_default(obj: Any) -> Any:
+    """
+    Convert values orjson cannot encode natively (OPT_SERIALIZE_NUMPY covers
+    NumPy scalars and plain arrays). orjson calls this again on the result.
+    """
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (np.ndarray, pd.Series, pd.Index)):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        # Subclasses such as pd.Timestamp are not encoded natively
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """
+    Encode a result as UTF-8 JSON, compact unless indent is requested.
+    Uses orjson when it is installed, which encodes NumPy/pandas values
+    directly; the standard library fallback converts them with to_native first.
+
+    Args:
+        obj: Result to encode (NumPy/pandas values are converted)
+        indent: Pretty-print with two-space indentation, for display only
+
+    Returns:
+        Encoded JSON
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(obj, default=_orjson_default, option=option)
+        except orjson.JSONEncodeError:
+            # E.g. dictionary keys orjson cannot encode, such as NumPy integers
+            return orjson.dumps(to_native(obj), option=option)
+    obj = to_native(obj)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """
+    Encode a result as a JSON string, compact unless indent is requested.
+
+    Args:
+        obj: Result to encode (NumPy/pandas values are converted)
+        indent: Pretty-print with two-space indentation, for display only
+
+    Returns:
+        Encoded JSON
+    """
+    return dumps_bytes(obj, indent=indent).decode()
+
+
+def write_jsonl(results: Iterable[Dict[str, Any]], output_path: str) -> int:
+    """
+    Write results to a JSON Lines file, one compact result per line.
+
+    Args:
+        results: Results to write
+        output_path: Destination file path
+
+    Returns:
+        Number of results written
+    """
+    count = 0
+    with open(output_path, 'wb') as file:
+        for result in results:
+            file.write(dumps_bytes(result))
+            file.write(b"\n")
+            count += 1
+    return count
@@ -0,0 +1,240 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+# Product codes look like "DSK-0001"; the letters before the dash are the family
+PRODUCT_CODE_PATTERN = re.compile(r'\b([A-Za-z]{2,4})-\d+\b')
+
+
+def _char_ngrams(text: str, ngram_range: Tuple[int, int]) -> List[str]:
+    """
+    Split text into character n-grams, padding each word with spaces so
+    that word boundaries contribute to the grams.
+
+    Args:
+        text: Input text
+        ngram_range: Inclusive (min_n, max_n) range of n-gram sizes
+
+    Returns:
+        List of character n-grams
+    """
+    min_n, max_n = ngram_range
+    grams = []
+    for word in text.lower().split():
+        padded = f" {word} "
+        for n in range(min_n, max_n + 1):
+            if len(padded) < n:
+                break
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+def _l2_normalize(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    """
+    Scale each row of a sparse matrix to unit length.
+
+    Args:
+        matrix: Sparse matrix to normalize
+
+    Returns:
+        Row-normalized sparse matrix
+    """
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ matrix
+
+
+class ProductSimilarityIndex:
+    """
+    Character n-gram TF-IDF index over the product catalog, used to suggest
+    in-stock substitutes for products that could not be found.
+    """
+
+    def __init__(self, catalog_df: pd.DataFrame, ngram_range: Tuple[int, int] = (3, 4),
+                 price_tolerance: float = 0.5, min_family_score: float = 0.3):
+        """
+        Build the index from the catalog.
+
+        Args:
+            catalog_df: Product catalog DataFrame
+            ngram_range: Inclusive range of character n-gram sizes
+            price_tolerance: Relative distance from the reference price that
+                still counts as the same price band (0.5 means +/-50%)
+            min_family_score: Similarity the closest catalog match needs before its
+                family and price are used to rank suggestions
+        """
+        self.ngram_range = ngram_range
+        self.price_tolerance = price_tolerance
+        self.min_family_score = min_family_score
+
+        catalog = catalog_df.reset_index()
+        self.codes = catalog["Product_Code"].astype(str).to_numpy()
+        self.names = catalog["Product_Name"].astype(str).to_numpy()
+        self.prices = catalog["Price"].to_numpy(dtype=float)
+        self.stock = catalog["Available_in_Stock"].to_numpy(dtype=int)
+        self.families = np.array([code.split('-', 1)[0] for code in self.codes])
+
+        # Product types ("Sofa", "Wardrobe") that name exactly one family
+        type_families: Dict[str, set] = {}
+        for name, family in zip(self.names, self.families):
+            words = name.split()
+            if words:
+                type_families.setdefault(words[0].lower(), set()).add(family)
+        self.family_by_type = {word: families.pop() for word, families in type_families.items() if len(families) == 1}
+
+        documents = (
+            catalog["Product_Code"].astype(str) + " "
+            + catalog["Product_Name"].fillna("") + " "
+            + catalog["Description"].fillna("")
+        ).tolist()
+        self.vocabulary: Dict[str, int] = {}
+        counts = self._count_matrix(documents, grow_vocabulary=True)
+
+        # Smoothed inverse document frequency, as in the usual TF-IDF formulation
+        document_frequency = np.bincount(counts.indices, minlength=len(self.vocabulary))
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1.0
+
+        self.matrix = _l2_normalize(counts @ sparse.diags(self.idf)).tocsr()
+
+    def _count_matrix(self, documents: List[str], grow_vocabulary: bool = False) -> sparse.csr_matrix:
+        """
+        Build a sparse n-gram count matrix for a list of documents.
+
+        Args:
+            documents: Texts to vectorize
+            grow_vocabulary: Whether unseen n-grams are added to the vocabulary
+
+        Returns:
+            Sparse matrix of shape (len(documents), vocabulary size)
+        """
+        indptr = [0]
+        indices = []
+        for document in documents:
+            for gram in _char_ngrams(document, self.ngram_range):
+                column = self.vocabulary.get(gram)
+                if column is None:
+                    if not grow_vocabulary:
+                        continue
+                    column = self.vocabulary[gram] = len(self.vocabulary)
+                indices.append(column)
+            indptr.append(len(indices))
+
+        data = np.ones(len(indices), dtype=float)
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(documents), len(self.vocabulary)))
+        # Duplicate (row, column) entries are summed into term counts
+        matrix.sum_duplicates()
+        return matrix
+
+    def transform(self, queries: List[str]) -> sparse.csr_matrix:
+        """
+        Vectorize queries into the catalog's TF-IDF space.
+
+        Args:
+            queries: Product names or codes to vectorize
+
+        Returns:
+            Row-normalized sparse TF-IDF matrix
+        """
+        counts = self._count_matrix(queries)
+        return _l2_normalize(counts @ sparse.diags(self.idf)).tocsr()
+
+    def _named_family(self, query: str) -> Optional[str]:
+        """
+        Find the family a query names explicitly, by product code or product type.
+
+        Args:
+            query: Product name or code
+
+        Returns:
+            Family code, or None if the query names no family
+        """
+        code_match = PRODUCT_CODE_PATTERN.search(query)
+        if code_match:
+            return code_match.group(1).upper()
+        for word in query.lower().split():
+            if word in self.family_by_type:
+                return self.family_by_type[word]
+        return None
+
+    def suggest_substitutes(self, queries: List[str], top_k: int = 3,
+                            reference_prices: Optional[List[Optional[float]]] = None) -> Dict[str, List[Dict]]:
+        """
+        Suggest in-stock alternatives for every query with a single sparse
+        matrix multiply. Candidates from the same product family and price
+        band are ranked ahead of the rest, then by similarity. The family is
+        the one named in the query (code or product type), otherwise that of
+        the closest catalog match if it scores at least min_family_score;
+        weaker matches are ranked by similarity alone. Candidates without any
+        similarity are only suggested from a family the query names.
+
+        Args:
+            queries: Names or codes of the products that were not found
+            top_k: Number of suggestions to return per query
+            reference_prices: Optional expected price per query; when missing,
+                the price of the closest catalog match is used if it scores at
+                least min_family_score
+
+        Returns:
+            Dictionary mapping each query to a list of suggested products
+        """
+        if not queries:
+            return {}
+
+        scores = (self.transform(queries) @ self.matrix.T).toarray()
+        in_stock = self.stock > 0
+        suggestions = {}
+
+        for row, query in enumerate(queries):
+            row_scores = scores[row]
+            best = int(np.argmax(row_scores))
+            strong_match = row_scores[best] >= self.min_family_score
+
+            # A family named in the query wins, otherwise only trust a close catalog match
+            named_family = self._named_family(query or "")
+            if named_family is None and row_scores[best] <= 0:
+                suggestions[query] = []
+                continue
+            family = named_family or (self.families[best] if strong_match else None)
+
+            reference_price = None
+            if reference_prices is not None and row < len(reference_prices):
+                reference_price = reference_prices[row]
+            if reference_price is None and strong_match:
+                reference_price = self.prices[best]
+
+            no_boost = np.zeros(len(self.codes), dtype=bool)
+            same_family = self.families == family if family is not None else no_boost
+            if reference_price is not None:
+                lower = reference_price / (1 + self.price_tolerance)
+                upper = reference_price * (1 + self.price_tolerance)
+                same_band = (self.prices >= lower) & (self.prices <= upper)
+            else:
+                same_band = no_boost
+
+            named = same_family if named_family is not None else no_boost
+            candidates = np.flatnonzero(in_stock & ((row_scores > 0) | named))
+            # np.lexsort sorts by the last key first, so this ranks by family, then band, then score
+            order = np.lexsort((
+                -row_scores[candidates],
+                ~same_band[candidates],
+                ~same_family[candidates],
+            ))
+
+            suggestions[query] = [
+                {
+                    "product_code": str(self.codes[i]),
+                    "product_name": str(self.names[i]),
+                    "price": float(self.prices[i]),
+                    "available_in_stock": int(self.stock[i]),
+                    "similarity": round(float(row_scores[i]), 4),
+                    "same_family": bool(same_family[i]),
+                    "same_price_band": bool(same_band[i]),
+                }
+                for i in candidates[order[:top_k]]
+            ]
+
+        return suggestions
@@ -0,0 +1,74 @@
+import pytest
+
+from src.utils.data_preprocessing import (
+    preprocess_email,
+    strip_quoted_replies,
+    remove_signature_and_disclaimers,
+)
+
+
+DISCLAIMER = (
+    "CONFIDENTIALITY NOTICE: This email and any attachments are intended only for the "
+    "named addressee and may contain privileged information. If you have received this "
+    "email in error, please notify the sender and delete it from your system."
+)
+
+# Emails whose order details must survive cleaning, with the text that must be kept
+REGRESSION_CASES = [
+    (
+        "Hi,\n\nPlease note this order is confidential until launch. We need 12 Desk TRÄNHOLM 19 "
+        "and 3 Sofa VIKTMARK 446 by July 1.\n\nThanks",
+        ["12 Desk TRÄNHOLM 19", "3 Sofa VIKTMARK 446", "July 1"],
+    ),
+    (
+        "Hi,\n\nPrivileged pricing as agreed: Desk NORDMARK and Sofa VIKTMARK, usual quantities.\n\n"
+        "Thanks,\nJohn\n\n" + DISCLAIMER,
+        ["Desk NORDMARK", "Sofa VIKTMARK"],
+    ),
+    (
+        "Order:\n--\n- 9 x Coffee STRÅDAL 620\n- 2 x Desk NORDMARK 476",
+        ["9 x Coffee STRÅDAL 620", "2 x Desk NORDMARK 476"],
+    ),
+    (
+        "Please ship by Friday, see below.\n\n"
+        "On Mon, Jun 2, 2025 at 10:00 AM Sales <sales@example.com> wrote:\n"
+        "> - 4 x Sofa VIKTMARK 446",
+        ["4 x Sofa VIKTMARK 446"],
+    ),
+    (
+        "FYI, order from our Berlin office for 2025.\n\n"
+        "---------- Forwarded message ---------\n"
+        "From: Anna <anna@example.com>\n"
+        "Date: Mon, Jun 2, 2025 at 10:00 AM\n"
+        "Subject: Order\n\n"
+        "- 5 x Wardrobe LUNDLUND 757",
+        ["5 x Wardrobe LUNDLUND 757"],
+    ),
+]
+
+
+@pytest.mark.parametrize("raw, expected", REGRESSION_CASES)
+def test_preprocessing_keeps_order_details(raw, expected):
+    cleaned, _ = preprocess_email(raw)
+    for text in expected:
+        assert text in cleaned
+
+
+def test_quote_is_stripped_when_new_message_has_order_lines():
+    text = (
+        "- 3 x Desk NORDMARK 476\n\n"
+        "On Mon, Jun 2, 2025 at 10:00 AM Sales <sales@example.com> wrote:\n"
+        "> - 7 x Sofa VIKTMARK 446"
+    )
+    assert strip_quoted_replies(text) == "- 3 x Desk NORDMARK 476\n"
+
+
+def test_signature_is_removed_after_last_order_line():
+    text = "- 3 x Desk NORDMARK 476\n\nThanks,\nJohn\n-- \nJohn Smith\n+1 555 0100"
+    assert remove_signature_and_disclaimers(text) == "- 3 x Desk NORDMARK 476\n\nThanks,\nJohn\n"
+
+
+def test_preprocessing_reports_token_savings():
+    raw = "- 3 x Desk NORDMARK 476\n\n" + DISCLAIMER
+    _, stats = preprocess_email(raw)
+    assert stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"] > 0